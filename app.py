@@ -2,109 +2,126 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import atexit
+import functools
 import logging
 import os
-from pathlib import Path
-
-import customtkinter as ctk
-
-from ui.dashboard import Dashboard
-from ui.diagnostic_wizard import DiagnosticWizard
+import time
 
 from core.config import (
     LOG_FILE,
     SMARTCTL_PATH,
     HDPARM_PATH,
     BADBLOCKS_PATH,
-    F3PROBE_PATH,
-    COLOR_BG_MAIN,
-    COLOR_CARD_BG,
-    COLOR_TEXT_LIGHT,
-    COLOR_GOOD,
-    COLOR_CRIT,
-    COLOR_INFO
+    F3PROBE_PATH
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-logger = logging.getLogger("HddMonitor")
 
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler com buffer de 64KB: descarrega em WARNING+ ou a cada flush_interval segundos"""
 
-class HddMonitorApp(ctk.CTk):
-    def __init__(self):
-        super().__init__()
-        self.title("HddMonitor")
-        self.geometry("1000x700")
-        self.minsize(800, 600)
-        self.configure(fg_color=COLOR_BG_MAIN)
+    def __init__(self, filename, buffer_size: int = 65536, flush_interval: float = 30.0):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        super().__init__(filename, encoding="utf-8")
 
-        ctk.set_appearance_mode("Dark")
-        ctk.set_default_color_theme("blue")
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding)
 
-        self.dashboard = Dashboard(
-            self,
-            on_disk_select=self._open_diagnostic
-        )
-        self.dashboard.pack(fill="both", expand=True)
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
 
-        self.dashboard.start_monitoring()
-        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        now = time.monotonic()
+        if record.levelno >= logging.WARNING or now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
 
-    def _open_diagnostic(self, device: str):
-        logger.info(f"Abrindo diagnóstico para {device}")
-        DiagnosticWizard(self, device)
 
-    def _on_close(self):
-        logger.info("Fechando HddMonitor")
-        self.dashboard.stop_monitoring()
-        self.destroy()
+logger = logging.getLogger("HddMonitor")
+
+_SEP = "=" * 60
+_WARN_HEADER = "\n⚠️  Avisos de dependências:\n"
+_WARN_FOOTER = "   Dica: execute 'bash install.sh' para instalar tudo automaticamente\n\n"
 
 
+# (caminho, aviso) das ferramentas externas; caminhos resolvidos em core.config
+_TOOLS = (
+    (SMARTCTL_PATH, "smartctl não encontrado → instale smartmontools"),
+    (HDPARM_PATH, "hdparm não encontrado → instale hdparm"),
+    (BADBLOCKS_PATH, "badblocks não encontrado → instale e2fsprogs"),
+    (F3PROBE_PATH, "f3probe não encontrado (opcional) → instale f3"),
+)
+
+
+@functools.lru_cache(maxsize=None)
 def check_dependencies():
+    # Agrupa por diretório: um listdir cobre várias ferramentas (ex.: /usr/sbin)
+    by_dir = {}
+    for path, msg in _TOOLS:
+        directory, name = os.path.split(path)
+        by_dir.setdefault(directory, []).append((name, path, msg))
+
     warnings = []
-    if not Path(SMARTCTL_PATH).exists():
-        warnings.append("smartctl não encontrado → instale smartmontools")
-    if not Path(HDPARM_PATH).exists():
-        warnings.append("hdparm não encontrado → instale hdparm")
-    if not Path(BADBLOCKS_PATH).exists():
-        warnings.append("badblocks não encontrado → instale e2fsprogs")
-    if not Path(F3PROBE_PATH).exists():
-        warnings.append("f3probe não encontrado (opcional) → instale f3")
-    return warnings
+    for directory, tools in by_dir.items():
+        if len(tools) == 1:
+            _, path, msg = tools[0]
+            if not os.path.exists(path):
+                warnings.append(msg)
+            continue
+        try:
+            present = set(os.listdir(directory))
+        except OSError:
+            present = set()
+        warnings.extend(msg for name, _, msg in tools if name not in present)
+
+    # Mantém a ordem original dos avisos
+    return tuple(msg for _, msg in _TOOLS if msg in warnings)
+
+
+def setup_logging():
+    """Configura o log do aplicativo (arquivo bufferizado + stderr se for terminal)"""
+    file_handler = BufferedFileHandler(LOG_FILE)
+    atexit.register(file_handler.flush)
+
+    # Sem terminal (ex.: lançado pelo menu), ninguém lê o stderr
+    handlers = [file_handler]
+    if sys.stderr is not None and sys.stderr.isatty():
+        handlers.append(logging.StreamHandler())
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=handlers
+    )
 
 
 def main():
-    logger.info("=" * 60)
+    setup_logging()
+
+    environ = os.environ
+    is_root = os.geteuid() == 0
+    has_display = environ.get('DISPLAY') or environ.get('WAYLAND_DISPLAY')
+
+    logger.info(_SEP)
     logger.info("HddMonitor Iniciando")
-    logger.info("=" * 60)
+    logger.info(_SEP)
 
     warnings = check_dependencies()
     if warnings:
-        print("\n⚠️  Avisos de dependências:")
-        for w in warnings:
-            print(f"   • {w}")
-        print("   Dica: execute 'bash install.sh' para instalar tudo automaticamente\n")
-
-    try:
-        import customtkinter
-    except ImportError:
-        print("❌ customtkinter não instalado!")
-        print("   Execute: bash install.sh")
-        sys.exit(1)
-
-    # Verifica se está rodando como root
-    is_root = os.geteuid() == 0
-
-    # Verifica se tem display (X11/Wayland)
-    has_display = os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')
+        sys.stdout.write(
+            _WARN_HEADER + "".join(f"   • {w}\n" for w in warnings) + _WARN_FOOTER
+        )
 
+    # Root sem display (X11/Wayland): sudo não repassou o ambiente gráfico
     if is_root and not has_display:
         print("\n❌ Erro: sudo não herda o ambiente gráfico ($DISPLAY)")
         print("\n   Use: sudo -E bash run.sh\n")
@@ -113,13 +130,23 @@ def main():
     if not is_root:
         print("\n💡 Para acesso SMART completo: sudo -E bash run.sh\n")
 
+    # A interface (Tk, customtkinter, widgets) só é carregada depois das verificações
+    try:
+        import customtkinter
+    except ImportError:
+        print("❌ customtkinter não instalado!")
+        print("   Execute: bash install.sh")
+        sys.exit(1)
+
+    from ui.main_window import HddMonitorApp
+
     try:
         app = HddMonitorApp()
         app.mainloop()
     except KeyboardInterrupt:
         logger.info("Interrompido pelo usuário")
     except Exception as e:
-        logger.error(f"Erro fatal: {e}", exc_info=True)
+        logger.error("Erro fatal: %s", e, exc_info=True)
         raise
     finally:
         logger.info("HddMonitor Encerrado")
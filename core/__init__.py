@@ -1,11 +1,24 @@
 # core/__init__.py
-from .config import (
-    SMARTCTL_PATH, HDPARM_PATH, BADBLOCKS_PATH, F3PROBE_PATH,
-    LOG_FILE, SMART_CACHE_TTL, REFRESH_RATE_MS,
-    COLOR_BG_MAIN, COLOR_CARD_BG, COLOR_TEXT_LIGHT, COLOR_TEXT_GRAY,
-    COLOR_GOOD, COLOR_WARN, COLOR_CRIT, COLOR_NA, COLOR_INFO
-)
-
-IGNORE_DEVICES = ['loop', 'sr0', 'dm-', 'zram']
-IGNORE_MOUNTS = ['/boot/efi', '/sys', '/proc', '/dev/', '/run/user', 'snap']
-IGNORE_FSTYPES = ['tmpfs', 'squashfs', 'devtmpfs', 'overlay']
\ No newline at end of file
+from . import config as _config
+
+# Nomes de core.config reexportados; resolvidos sob demanda (PEP 562)
+_CONFIG_EXPORTS = frozenset({
+    "SMARTCTL_PATH", "HDPARM_PATH", "BADBLOCKS_PATH", "F3PROBE_PATH",
+    "LOG_FILE", "SMART_CACHE_TTL", "REFRESH_RATE_MS",
+    "COLOR_BG_MAIN", "COLOR_CARD_BG", "COLOR_TEXT_LIGHT", "COLOR_TEXT_GRAY",
+    "COLOR_GOOD", "COLOR_WARN", "COLOR_CRIT", "COLOR_NA", "COLOR_INFO",
+    "IGNORE_DEVICES", "IGNORE_DEVICES_RE", "IGNORE_MOUNTS", "IGNORE_MOUNTS_RE", "IGNORE_FSTYPES",
+})
+
+
+def __getattr__(name):
+    if name in _CONFIG_EXPORTS:
+        value = getattr(_config, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _CONFIG_EXPORTS)
+
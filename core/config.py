@@ -1,17 +1,114 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
+import hashlib
+import json
+import os
+import re
 import shutil
 from pathlib import Path
 
+
+# Diretório home resolvido uma única vez
+HOME_DIR = Path(os.path.expanduser("~"))
+
+# Diretório de logs (por usuário)
+LOG_DIR = HOME_DIR / ".cache" / "hddmonitor"
+if not os.path.isdir(LOG_DIR):
+    os.makedirs(LOG_DIR, exist_ok=True)
+LOG_FILE = LOG_DIR / "hddmonitor.log"
+
+# Cache persistente dos caminhos de executáveis
+PATHS_CACHE_FILE = LOG_DIR / "paths.json"
+
+# Cache persistente do driver smartctl que funcionou em cada disco
+DRIVERS_CACHE_FILE = LOG_DIR / "drivers.json"
+
+
+def _path_fingerprint() -> str:
+    """Hash estável do $PATH e do mtime de cada diretório dele.
+
+    Instalar ou remover um pacote altera o mtime do diretório, o que
+    invalida o cache sem precisar checar cada ferramenta.
+    (hash() do Python muda a cada processo, por isso blake2b.)
+    """
+    h = hashlib.blake2b(os.environ.get("PATH", "").encode(), digest_size=8)
+    for directory in os.get_exec_path():
+        try:
+            h.update(str(os.stat(directory).st_mtime_ns).encode())
+        except OSError:
+            h.update(b"-")
+    return h.hexdigest()
+
+
+def _load_paths_cache() -> dict:
+    """Lê o cache de executáveis; descarta se o $PATH mudou"""
+    try:
+        with open(PATHS_CACHE_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("path_hash") == _PATH_FINGERPRINT:
+            return data.get("tools", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _save_paths_cache(tools: dict):
+    """Grava o cache de forma atômica (arquivo temporário + rename)"""
+    tmp_file = PATHS_CACHE_FILE.with_suffix(".tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"path_hash": _PATH_FINGERPRINT, "tools": tools}, f)
+        os.replace(tmp_file, PATHS_CACHE_FILE)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=None)
+def _path_index() -> dict:
+    """Índice nome → caminho de todos os arquivos do $PATH (um scandir por diretório)"""
+    index = {}
+    for directory in os.get_exec_path():
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name not in index:
+                        index[entry.name] = entry.path
+        except OSError:
+            continue
+    return index
+
+
+def _which(name: str) -> str:
+    """Equivalente a shutil.which usando o índice do $PATH"""
+    path = _path_index().get(name)
+    if path and os.access(path, os.X_OK) and not os.path.isdir(path):
+        return path
+    # Primeira ocorrência não executável: deixa o shutil decidir
+    return shutil.which(name) if path else None
+
+
+_PATH_FINGERPRINT = _path_fingerprint()
+_paths_cache = _load_paths_cache()
+_paths_cache_dirty = False
+
+
+@functools.lru_cache(maxsize=None)
 def find_executable(name: str, fallback: str = None) -> str:
     """Procura o executável no PATH ou usa o fallback"""
-    path = shutil.which(name)
-    if path:
-        return path
-    if fallback and Path(fallback).exists():
-        return fallback
-    return fallback or f"/usr/bin/{name}"
+    global _paths_cache_dirty
+
+    # Cache válido para este $PATH: nenhum acesso ao sistema de arquivos
+    cached = _paths_cache.get(name)
+    if cached:
+        return cached
+
+    path = _which(name) or fallback or f"/usr/bin/{name}"
+
+    _paths_cache[name] = path
+    _paths_cache_dirty = True
+    return path
 
 
 # Caminhos das ferramentas (resolvidos automaticamente)
@@ -25,17 +122,17 @@ LSBLK_PATH      = find_executable("lsblk",      "/usr/bin/lsblk")
 FDISK_PATH      = find_executable("fdisk",      "/usr/sbin/fdisk")
 LSUSB_PATH      = find_executable("lsusb",      "/usr/bin/lsusb")
 UDEVADM_PATH    = find_executable("udevadm",    "/usr/bin/udevadm")
+BLOCKDEV_PATH   = find_executable("blockdev",   "/usr/sbin/blockdev")
 
-
-# Diretório de logs (por usuário)
-LOG_DIR = Path.home() / ".cache" / "hddmonitor"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-LOG_FILE = LOG_DIR / "hddmonitor.log"
+if _paths_cache_dirty:
+    _save_paths_cache(_paths_cache)
+    _paths_cache_dirty = False
 
 
 # Diretório de relatórios (por usuário)
-REPORT_DIR = Path.home() / "Documents" / "hddmonitor-reports"
-REPORT_DIR.mkdir(parents=True, exist_ok=True)
+REPORT_DIR = HOME_DIR / "Documents" / "hddmonitor-reports"
+if not os.path.isdir(REPORT_DIR):
+    os.makedirs(REPORT_DIR, exist_ok=True)
 
 
 # Configurações gerais
@@ -63,4 +160,8 @@ COLOR_INFO       = "#3498db"
 # Filtros de dispositivos
 IGNORE_DEVICES = ['loop', 'sr0', 'dm-', 'zram']
 IGNORE_MOUNTS  = ['/boot/efi', '/sys', '/proc', '/dev/', '/run/user', 'snap']
-IGNORE_FSTYPES = ['tmpfs', 'squashfs', 'devtmpfs', 'overlay']
+IGNORE_FSTYPES = frozenset(['tmpfs', 'squashfs', 'devtmpfs', 'overlay'])
+
+# Dispositivos e pontos de montagem são filtrados por substring: uma única regex compilada
+IGNORE_DEVICES_RE = re.compile('|'.join(re.escape(d) for d in IGNORE_DEVICES))
+IGNORE_MOUNTS_RE = re.compile('|'.join(re.escape(m) for m in IGNORE_MOUNTS))
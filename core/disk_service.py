@@ -2,24 +2,61 @@
 # -*- coding: utf-8 -*-
 
 import psutil
+import functools
+import os
 import subprocess
+import sys
 import re
 import time
 import logging
-from pathlib import Path
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict
 
+try:
+    from orjson import loads as json_loads  # opcional, bem mais rápido
+except ImportError:
+    from json import loads as json_loads
+
 from core.config import (
-    SMARTCTL_PATH, IGNORE_DEVICES, IGNORE_MOUNTS,
+    SMARTCTL_PATH, LSBLK_PATH, UDEVADM_PATH, BLOCKDEV_PATH,
+    IGNORE_DEVICES_RE, IGNORE_MOUNTS_RE,
     IGNORE_FSTYPES, SMART_CACHE_TTL
 )
 from core.smart_parser import SmartParser
 
 logger = logging.getLogger(__name__)
 
+# Limite de entradas por cache de SMART (discos conectados ao longo da sessão)
+SMART_CACHE_MAXLEN = 512
+# Limite de perfis de hardware memorizados (mesmo tamanho do antigo lru_cache)
+PROFILE_CACHE_MAXLEN = 128
+
+_RE_TRAILING_DIGITS = re.compile(r'\d+$')
+
+# Atributos SMART típicos de SSD
+_SSD_ATTR_IDS = frozenset({
+    170, 171, 172, 173, 174,  # NAND/Flash related
+    177,  # Wear_Leveling_Count
+    180,  # Unused_Rsvd_Blk_Cnt
+    202,  # Data_Address_Mark_Errors / Percent_Lifetime_Used
+    231,  # SSD_Life_Left / Temperature_Celsius
+    233,  # Media_Wearout_Indicator
+    234,  # AvgErase_Ct
+    241,  # Total_LBAs_Written
+    242,  # Total_LBAs_Read
+})
+# Palavras-chave de SSD nos nomes dos atributos (sem .lower() por atributo)
+_RE_SSD_ATTR_NAME = re.compile(r'wear_level|nand|flash|ssd_life|media_wearout', re.IGNORECASE)
+
+
+# slots=True só existe a partir do Python 3.10 (ainda suportamos 3.8)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class DiskInfo:
     device: str
     base_device: str
@@ -40,8 +77,17 @@ class DiskInfo:
 
 
 class DiskService:
-    _smart_cache: Dict[str, dict] = {}
-    _cache_timestamp: Dict[str, float] = {}
+    # device -> (timestamp, dados), em ordem de escrita (mais antigo primeiro)
+    _smart_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _smart_json_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _lsblk_cache: Dict[str, dict] = {}
+    _lsblk_timestamp: float = 0
+    _udev_cache: Dict[str, Dict[str, str]] = {}
+    _udev_timestamp: float = 0
+    _sysfs_path_cache: Dict[str, str] = {}
+    # (base, serial, size) -> (tipo, rpm, interface); só perfis completos
+    _profile_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _cache_lock = threading.Lock()
 
     SMART_DRIVERS = {
         "nvme": ["-d", "nvme"],
@@ -59,139 +105,251 @@ class DiskService:
         seen_devices = set()
 
         # Primeiro, usa lsblk para obter TODOS os discos físicos (tipo "disk")
+        snapshot = cls._lsblk_snapshot(force_refresh=True)
+        # Links de /sys/block valem por uma varredura: após hot-plug o mesmo sdX
+        # pode ser outro disco (um readlink por disco é barato)
+        with cls._cache_lock:
+            cls._sysfs_path_cache.clear()
+        devs = []
+        for device, dev in snapshot.items():
+            if dev.get("type") != "disk":
+                continue
+            # Ignora dispositivos na lista de exclusão
+            if IGNORE_DEVICES_RE.search(device):
+                continue
+            devs.append(dev)
+
+        # Tabela de montagens lida uma vez só, compartilhada por todos os discos
         try:
-            result = subprocess.run(
-                ["lsblk", "-J", "-d", "-o", "NAME,SIZE,TYPE,MOUNTPOINT,MODEL,ROTA,TRAN"],
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
-                import json
-                data = json.loads(result.stdout)
-                for dev in data.get("blockdevices", []):
-                    if dev.get("type") != "disk":
-                        continue
-
-                    name = dev.get("name", "")
-                    device = f"/dev/{name}"
-
-                    # Ignora dispositivos na lista de exclusão
-                    if any(x in device for x in IGNORE_DEVICES):
-                        continue
-
-                    # Obtém informações SMART
-                    smart = cls._get_smart_info(device)
-
-                    # Obtém tamanho do disco
-                    total_gb = cls._get_disk_size(device)
-
-                    # Verifica se está montado e obtém uso
-                    used_pct = 0
-                    mount_point = ""
-                    try:
-                        for part in psutil.disk_partitions(all=True):
-                            if name in part.device:
-                                usage = psutil.disk_usage(part.mountpoint)
-                                used_pct = usage.percent
-                                mount_point = part.mountpoint
-                                break
-                    except:
-                        pass
-
-                    # Tipo do disco
-                    disk_type = smart.get("type", "Unknown")
-                    if disk_type == "Unknown":
-                        if "nvme" in name:
-                            disk_type = "NVMe"
-                        elif dev.get("rota") == "0":
-                            disk_type = "SSD"
-                        elif dev.get("rota") == "1":
-                            disk_type = "HDD"
-
-                    disk = DiskInfo(
-                        device=device,
-                        base_device=device,
-                        mount_point=mount_point or "(não montado)",
-                        total_gb=total_gb,
-                        used_pct=used_pct,
-                        temp=smart.get("temp"),
-                        disk_type=disk_type,
-                        health=smart.get("health", "Unknown"),
-                        model=smart.get("model", "") or dev.get("model", ""),
-                        serial=smart.get("serial", ""),
-                        smart_supported=smart.get("smart_supported", False),
-                        smart_enabled=smart.get("smart_enabled", False),
-                        smart_driver=smart.get("driver", ""),
-                        rpm=smart.get("rpm"),
-                        interface=smart.get("interface", "Unknown")
-                    )
-                    disks.append(disk)
-                    seen_devices.add(device)
+            partitions = psutil.disk_partitions(all=False)
+        except Exception:
+            partitions = []
+        build = functools.partial(cls._try_build_disk_from_lsblk, partitions=partitions)
 
-        except Exception as e:
-            logger.error(f"Erro ao usar lsblk: {e}")
+        # Coleta de cada disco é dominada por subprocessos: roda em paralelo
+        for disk in cls._map_parallel(build, devs):
+            if disk is None:
+                continue
+            disks.append(disk)
+            seen_devices.add(disk.device)
 
         # Fallback: se lsblk falhou, usa o método antigo com psutil
         if not disks:
-            partitions = psutil.disk_partitions(all=True)
-
-            for part in partitions:
-                if any(x in part.device for x in IGNORE_DEVICES):
+            partitions = []
+            for part in psutil.disk_partitions(all=True):
+                if IGNORE_DEVICES_RE.search(part.device):
                     continue
-                if any(x in part.mountpoint for x in IGNORE_MOUNTS):
+                if IGNORE_MOUNTS_RE.search(part.mountpoint):
                     continue
                 if part.fstype in IGNORE_FSTYPES:
                     continue
 
-                try:
-                    usage = psutil.disk_usage(part.mountpoint)
-                    base_device = cls._get_base_device(part.device)
-
-                    if base_device in seen_devices:
-                        continue
-
-                    smart = cls._get_smart_info(base_device)
-
-                    disk = DiskInfo(
-                        device=base_device,
-                        base_device=base_device,
-                        mount_point=part.mountpoint,
-                        total_gb=usage.total / (1024 ** 3),
-                        used_pct=usage.percent,
-                        temp=smart.get("temp"),
-                        disk_type=smart.get("type", "Unknown"),
-                        health=smart.get("health", "Unknown"),
-                        model=smart.get("model", ""),
-                        serial=smart.get("serial", ""),
-                        smart_supported=smart.get("smart_supported", False),
-                        smart_enabled=smart.get("smart_enabled", False),
-                        smart_driver=smart.get("driver", ""),
-                        rpm=smart.get("rpm"),
-                        interface=smart.get("interface", "Unknown")
-                    )
-                    disks.append(disk)
-                    seen_devices.add(base_device)
-
-                except (OSError, PermissionError) as e:
-                    logger.warning(f"Ignorando {part.device}: {e}")
+                base_device = cls._get_base_device(part.device)
+                if base_device in seen_devices:
                     continue
+                seen_devices.add(base_device)
+                partitions.append((part, base_device))
+
+            for disk in cls._map_parallel(cls._build_disk_from_partition, partitions):
+                if disk is not None:
+                    disks.append(disk)
 
         return disks
 
+    @staticmethod
+    def _find_mount(name: str, partitions: Optional[list] = None):
+        """Primeira partição montada cujo dispositivo contém name (ex: "sda" -> /dev/sda1)"""
+        if partitions is None:
+            # Só montagens de dispositivos reais; evita varrer proc/sys/tmpfs
+            partitions = psutil.disk_partitions(all=False)
+        for part in partitions:
+            if name in part.device:
+                return part
+        return None
+
+    @staticmethod
+    def _map_parallel(func, items: list) -> list:
+        """Aplica func em paralelo preservando a ordem dos itens"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(32, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    @classmethod
+    def _try_build_disk_from_lsblk(cls, dev: dict, partitions: Optional[list] = None) -> Optional[DiskInfo]:
+        """_build_disk_from_lsblk que registra o erro e devolve None (um disco com
+        falha não derruba a lista inteira nem impede o fallback via psutil)"""
+        try:
+            return cls._build_disk_from_lsblk(dev, partitions)
+        except Exception as e:
+            logger.error(f"Erro ao usar lsblk: {e}")
+            return None
+
+    @classmethod
+    def _build_disk_from_lsblk(cls, dev: dict, partitions: Optional[list] = None) -> DiskInfo:
+        name = dev.get("name", "")
+        device = f"/dev/{name}"
+
+        # Obtém informações SMART
+        smart = cls._get_smart_info(device)
+
+        # Obtém tamanho do disco
+        total_gb = cls._get_disk_size(device, snapshot=cls._lsblk_snapshot())
+
+        # Verifica se está montado e obtém uso
+        used_pct = 0
+        mount_point = ""
+        try:
+            part = cls._find_mount(name, partitions)
+            if part is not None:
+                used_pct = psutil.disk_usage(part.mountpoint).percent
+                mount_point = part.mountpoint
+        except:
+            pass
+
+        # Tipo do disco
+        disk_type = smart.get("type", "Unknown")
+        if disk_type == "Unknown":
+            if "nvme" in name:
+                disk_type = "NVMe"
+            elif cls._lsblk_flag(dev.get("rota")) is False:
+                disk_type = "SSD"
+            elif cls._lsblk_flag(dev.get("rota")) is True:
+                disk_type = "HDD"
+
+        return DiskInfo(
+            device=device,
+            base_device=device,
+            mount_point=mount_point or "(não montado)",
+            total_gb=total_gb,
+            used_pct=used_pct,
+            temp=smart.get("temp"),
+            disk_type=disk_type,
+            health=smart.get("health", "Unknown"),
+            model=smart.get("model", "") or dev.get("model", ""),
+            serial=smart.get("serial", ""),
+            smart_supported=smart.get("smart_supported", False),
+            smart_enabled=smart.get("smart_enabled", False),
+            smart_driver=smart.get("driver", ""),
+            rpm=smart.get("rpm"),
+            interface=smart.get("interface", "Unknown")
+        )
+
+    @classmethod
+    def _build_disk_from_partition(cls, item) -> Optional[DiskInfo]:
+        part, base_device = item
+        try:
+            usage = psutil.disk_usage(part.mountpoint)
+            smart = cls._get_smart_info(base_device)
+
+            return DiskInfo(
+                device=base_device,
+                base_device=base_device,
+                mount_point=part.mountpoint,
+                total_gb=usage.total / (1024 ** 3),
+                used_pct=usage.percent,
+                temp=smart.get("temp"),
+                disk_type=smart.get("type", "Unknown"),
+                health=smart.get("health", "Unknown"),
+                model=smart.get("model", ""),
+                serial=smart.get("serial", ""),
+                smart_supported=smart.get("smart_supported", False),
+                smart_enabled=smart.get("smart_enabled", False),
+                smart_driver=smart.get("driver", ""),
+                rpm=smart.get("rpm"),
+                interface=smart.get("interface", "Unknown")
+            )
+
+        except (OSError, PermissionError) as e:
+            logger.warning(f"Ignorando {part.device}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Erro ao ler {part.device}: {e}")
+            return None
+
     @classmethod
     def get_block_devices(cls) -> List[dict]:
         try:
             result = subprocess.run(
-                ["lsblk", "-J", "-o", "NAME,SIZE,TYPE,MOUNTPOINT,MODEL,SERIAL,ROTA,TRAN"],
-                capture_output=True, text=True, timeout=10
+                [LSBLK_PATH, "-J", "-o", "NAME,SIZE,TYPE,MOUNTPOINT,MODEL,SERIAL,ROTA,TRAN"],
+                capture_output=True, timeout=10
             )
             if result.returncode == 0:
-                import json
-                data = json.loads(result.stdout)
+                data = json_loads(result.stdout)
                 return data.get("blockdevices", [])
         except Exception as e:
             logger.error(f"Erro ao executar lsblk: {e}")
         return []
 
+    @classmethod
+    def _lsblk_snapshot(cls, force_refresh: bool = False) -> Dict[str, dict]:
+        """Snapshot de todos os discos via um único lsblk: {"/dev/sda": {...}}"""
+        now = time.time()
+        with cls._cache_lock:
+            if not force_refresh and now - cls._lsblk_timestamp < SMART_CACHE_TTL:
+                return cls._lsblk_cache
+
+        snapshot = {}
+        try:
+            result = subprocess.run(
+                [LSBLK_PATH, "-J", "-b", "-d", "-o", "NAME,SIZE,TYPE,MOUNTPOINT,MODEL,SERIAL,ROTA,TRAN"],
+                capture_output=True, timeout=10
+            )
+            if result.returncode == 0:
+                data = json_loads(result.stdout)
+                for dev in data.get("blockdevices", []):
+                    snapshot[f"/dev/{dev.get('name', '')}"] = dev
+        except Exception as e:
+            logger.error(f"Erro ao usar lsblk: {e}")
+
+        with cls._cache_lock:
+            cls._lsblk_cache = snapshot
+            cls._lsblk_timestamp = now
+        return snapshot
+
+    @classmethod
+    def _udev_snapshot(cls) -> Dict[str, Dict[str, str]]:
+        """Propriedades udev de todos os discos via um único "udevadm info --export-db".
+
+        Retorna {"/dev/sda": {"ID_BUS": "ata", "ID_ATA_ROTATION_RATE_RPM": "7200", ...}}
+        """
+        now = time.time()
+        with cls._cache_lock:
+            if now - cls._udev_timestamp < SMART_CACHE_TTL:
+                return cls._udev_cache
+
+        snapshot = {}
+        try:
+            result = subprocess.run(
+                [UDEVADM_PATH, "info", "--export-db"],
+                capture_output=True, text=True, timeout=10
+            )
+            # Registros separados por linha em branco; "E: CHAVE=VALOR" são as propriedades
+            for record in result.stdout.split("\n\n"):
+                props = {}
+                for line in record.splitlines():
+                    if line.startswith("E: "):
+                        key, _, value = line[3:].partition("=")
+                        props[key] = value
+                if props.get("SUBSYSTEM") == "block" and props.get("DEVTYPE") == "disk":
+                    snapshot[props.get("DEVNAME", "")] = props
+        except Exception as e:
+            logger.debug(f"udevadm --export-db falhou: {e}")
+
+        with cls._cache_lock:
+            cls._udev_cache = snapshot
+            cls._udev_timestamp = now
+        return snapshot
+
+    @staticmethod
+    def _lsblk_flag(value) -> Optional[bool]:
+        """Normaliza ROTA do lsblk (bool nas versões novas, "0"/"1" nas antigas)"""
+        if isinstance(value, bool):
+            return value
+        if value in ("0", "1", 0, 1):
+            return str(value) == "1"
+        return None
+
     @classmethod
     def get_disk_by_device(cls, device: str) -> Optional[DiskInfo]:
         base = cls._get_base_device(device)
@@ -203,13 +361,12 @@ class DiskService:
 
         # Primeiro tenta obter de partições montadas
         try:
-            for part in psutil.disk_partitions(all=True):
-                if base in part.device:
-                    usage = psutil.disk_usage(part.mountpoint)
-                    total_gb = usage.total / (1024 ** 3)
-                    used_pct = usage.percent
-                    mount_point = part.mountpoint
-                    break
+            part = cls._find_mount(base)
+            if part is not None:
+                usage = psutil.disk_usage(part.mountpoint)
+                total_gb = usage.total / (1024 ** 3)
+                used_pct = usage.percent
+                mount_point = part.mountpoint
         except:
             pass
 
@@ -237,38 +394,36 @@ class DiskService:
         )
 
     @classmethod
-    def _get_disk_size(cls, device: str) -> float:
+    def _get_disk_size(cls, device: str, snapshot: Optional[Dict[str, dict]] = None) -> float:
         """Obtém tamanho do disco mesmo se não montado"""
-        # Método 1: blockdev (mais preciso, requer root)
-        try:
-            result = subprocess.run(
-                ["blockdev", "--getsize64", device],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0:
-                size_bytes = int(result.stdout.strip())
-                return size_bytes / (1024 ** 3)
-        except:
-            pass
+        if snapshot is None:
+            snapshot = cls._lsblk_snapshot()
 
-        # Método 2: /sys/block (funciona sem root)
+        # Método 1: /sys/block (leitura em memória, funciona sem root)
         try:
             base_name = device.replace("/dev/", "")
-            size_file = Path(f"/sys/block/{base_name}/size")
-            if size_file.exists():
-                # size está em setores de 512 bytes
-                sectors = int(size_file.read_text().strip())
+            # size está em setores de 512 bytes
+            sectors = int(cls._read_sysfs(f"/sys/block/{base_name}/size"))
+            if sectors:
                 return (sectors * 512) / (1024 ** 3)
-        except:
+        except (OSError, ValueError):
+            pass
+
+        # Método 2: snapshot do lsblk (já coletado, sem subprocesso)
+        try:
+            size_bytes = int(snapshot.get(device, {}).get("size") or 0)
+            if size_bytes:
+                return size_bytes / (1024 ** 3)
+        except (TypeError, ValueError):
             pass
 
-        # Método 3: lsblk
+        # Método 3: blockdev (requer root)
         try:
             result = subprocess.run(
-                ["lsblk", "-b", "-d", "-n", "-o", "SIZE", device],
+                [BLOCKDEV_PATH, "--getsize64", device],
                 capture_output=True, text=True, timeout=5
             )
-            if result.returncode == 0 and result.stdout.strip():
+            if result.returncode == 0:
                 size_bytes = int(result.stdout.strip())
                 return size_bytes / (1024 ** 3)
         except:
@@ -282,22 +437,22 @@ class DiskService:
             device = device[5:]
         if device.startswith("nvme"):
             return "/dev/" + device.split("p")[0]
-        return "/dev/" + re.sub(r'\d+$', '', device)
+        return "/dev/" + _RE_TRAILING_DIGITS.sub('', device)
 
     @classmethod
     def _get_smart_info(cls, device: str, force_refresh: bool = False) -> dict:
         now = time.time()
-        if not force_refresh and device in cls._smart_cache and now - cls._cache_timestamp.get(device,
-                                                                                               0) < SMART_CACHE_TTL:
-            return cls._smart_cache[device]
+        with cls._cache_lock:
+            entry = cls._smart_cache.get(device)
+            if not force_refresh and entry and now - entry[0] < SMART_CACHE_TTL:
+                return entry[1]
 
         from core.smart_parser import SmartParser
-        smart_data = SmartParser.parse(device)
+        smart_data = SmartParser.parse(device, ttl=0 if force_refresh else SMART_CACHE_TTL)
 
         base = device.replace("/dev/", "")
-        disk_type = cls._detect_disk_type(base)
-        rpm = cls._get_rpm(device)
-        interface = cls._get_interface(base)
+        ident = cls._lsblk_snapshot().get(device, {})
+        disk_type, rpm, interface = cls._hardware_profile(base, ident.get("serial"), ident.get("size"))
 
         info = {
             "type": disk_type,
@@ -313,43 +468,84 @@ class DiskService:
             "interface": interface,
         }
 
-        cls._smart_cache[device] = info
-        cls._cache_timestamp[device] = now
+        with cls._cache_lock:
+            cls._cache_put(cls._smart_cache, device, now, info)
         return info
 
+    @classmethod
+    def _hardware_profile(cls, base: str, serial: Optional[str], size: Optional[int]) -> tuple:
+        """(tipo, rpm, interface) do disco, memorizado enquanto o hardware não muda.
+
+        serial e size entram na chave só para invalidar quando outro disco
+        assume o mesmo nome (hot-plug); clear_cache() limpa tudo. Resultados
+        com falha (tipo/interface "Unknown", HDD sem RPM) não são guardados,
+        para a próxima leitura tentar de novo.
+        """
+        # NVMe: tipo e interface conhecidos pelo nome, sem RPM
+        if "nvme" in base:
+            return ("NVMe", None, "NVMe")
+
+        key = (base, serial, size)
+        with cls._cache_lock:
+            profile = cls._profile_cache.get(key)
+        if profile is not None:
+            return profile
+
+        disk_type = cls._detect_disk_type(base)
+        rpm = cls._get_rpm(f"/dev/{base}")
+        interface = cls._get_interface(base)
+        profile = (disk_type, rpm, interface)
+
+        if "Unknown" not in (disk_type, interface) and not (disk_type == "HDD" and rpm is None):
+            with cls._cache_lock:
+                cls._profile_cache[key] = profile
+                while len(cls._profile_cache) > PROFILE_CACHE_MAXLEN:
+                    cls._profile_cache.popitem(last=False)
+        return profile
+
     @classmethod
     def _get_rpm(cls, device: str) -> Optional[int]:
         """Obtém RPM do disco (apenas para HDDs)"""
-        # Método 1: smartctl
-        try:
-            result = subprocess.run(
-                ["smartctl", "-i", device],
-                capture_output=True, text=True, timeout=10
-            )
-            match = re.search(r'Rotation Rate:\s*(\d+)\s*rpm', result.stdout, re.IGNORECASE)
-            if match:
-                return int(match.group(1))
-        except:
-            pass
+        # Método 1: smartctl (JSON compartilhado)
+        rpm = cls._run_smartctl_json(device).get("rotation_rate")
+        if isinstance(rpm, int) and rpm > 0:
+            return rpm
 
-        # Método 2: udevadm
+        # Método 2: udevadm (snapshot)
         try:
-            result = subprocess.run(
-                ["udevadm", "info", "--query=property", f"--name={device}"],
-                capture_output=True, text=True, timeout=5
-            )
-            match = re.search(r'ID_ATA_ROTATION_RATE_RPM=(\d+)', result.stdout)
-            if match:
-                rpm = int(match.group(1))
-                if rpm > 0:
-                    return rpm
-        except:
+            rpm = int(cls._udev_snapshot().get(device, {}).get("ID_ATA_ROTATION_RATE_RPM", 0))
+            if rpm > 0:
+                return rpm
+        except ValueError:
             pass
 
         return None
 
+    @staticmethod
+    def _read_sysfs(path: str) -> bytes:
+        """Lê um atributo pequeno do sysfs (open+read+close, sem stat); OSError se não existir"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.read(fd, 64)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def _sysfs_path(cls, base: str) -> str:
+        """Destino do link /sys/block/<base> (ex: ../devices/.../usb2/.../block/sdb), em cache até a próxima varredura"""
+        with cls._cache_lock:
+            path = cls._sysfs_path_cache.get(base)
+        if path is None:
+            try:
+                path = os.readlink(f"/sys/block/{base}")
+            except OSError:
+                path = ""
+            with cls._cache_lock:
+                cls._sysfs_path_cache[base] = path
+        return path
+
     @classmethod
-    def _get_interface(cls, base: str) -> str:
+    def _get_interface(cls, base: str, snapshot: Optional[Dict[str, dict]] = None) -> str:
         """Detecta interface de conexão (USB, SATA, NVMe, etc.)"""
         if base.startswith("/dev/"):
             base = base[5:]
@@ -358,13 +554,20 @@ class DiskService:
         if "nvme" in base.lower():
             return "NVMe"
 
-        # Método 1: lsblk TRAN
+        # Método 1: caminho real em /sys/block (sem subprocesso)
+        real_path = cls._sysfs_path(base)
+        if "/usb" in real_path:
+            return "USB"
+        if "/ata" in real_path or "/sata" in real_path:
+            return "SATA"
+        if "/nvme" in real_path:
+            return "NVMe"
+
+        # Método 2: lsblk TRAN (snapshot)
         try:
-            result = subprocess.run(
-                ["lsblk", "-d", "-n", "-o", "TRAN", f"/dev/{base}"],
-                capture_output=True, text=True, timeout=5
-            )
-            tran = result.stdout.strip().upper()
+            if snapshot is None:
+                snapshot = cls._lsblk_snapshot()
+            tran = (snapshot.get(f"/dev/{base}", {}).get("tran") or "").upper()
             if tran:
                 # Mapeia para nomes mais amigáveis
                 tran_map = {
@@ -379,50 +582,30 @@ class DiskService:
         except:
             pass
 
-        # Método 2: udevadm ID_BUS
-        try:
-            result = subprocess.run(
-                ["udevadm", "info", "--query=property", f"--name=/dev/{base}"],
-                capture_output=True, text=True, timeout=5
-            )
-
-            # Verifica se é USB
-            if "ID_USB_DRIVER=" in result.stdout or "ID_BUS=usb" in result.stdout:
-                return "USB"
-
-            # Verifica se é ATA/SATA
-            if "ID_ATA=" in result.stdout or "ID_BUS=ata" in result.stdout:
-                return "SATA"
+        # Método 3: udevadm ID_BUS (snapshot)
+        props = cls._udev_snapshot().get(f"/dev/{base}", {})
 
-        except:
-            pass
+        # Verifica se é USB
+        if "ID_USB_DRIVER" in props or props.get("ID_BUS") == "usb":
+            return "USB"
 
-        # Método 3: /sys/block path
-        try:
-            device_path = Path(f"/sys/block/{base}/device")
-            if device_path.exists():
-                real_path = str(device_path.resolve())
-                if "/usb" in real_path:
-                    return "USB"
-                if "/ata" in real_path or "/sata" in real_path:
-                    return "SATA"
-                if "/nvme" in real_path:
-                    return "NVMe"
-        except:
-            pass
+        # Verifica se é ATA/SATA
+        if "ID_ATA" in props or props.get("ID_BUS") == "ata":
+            return "SATA"
 
         return "Unknown"
 
     @classmethod
-    def _detect_disk_type(cls, base: str) -> str:
+    def _detect_disk_type(cls, base: str, snapshot: Optional[Dict[str, dict]] = None) -> str:
         """
         Detecta tipo de disco (NVMe, SSD, HDD) usando múltiplas fontes.
         Prioridade:
         1. NVMe pelo nome
-        2. smartctl "Rotation Rate" (mais confiável para USB)
-        3. udevadm ID_ATA_ROTATION_RATE_RPM
-        4. Atributos SMART específicos de SSD
-        5. /sys/block/rotational (fallback)
+        2. /sys/block/rotational (exceto "1" em pontes USB)
+        3. smartctl "Rotation Rate" (mais confiável para USB)
+        4. udevadm ID_ATA_ROTATION_RATE_RPM
+        5. Atributos SMART específicos de SSD
+        6. lsblk ROTA (fallback)
         """
         try:
             # Remove /dev/ se presente
@@ -435,26 +618,39 @@ class DiskService:
 
             device = f"/dev/{base}"
 
-            # 2. smartctl "Rotation Rate" - MAIS CONFIÁVEL
+            # 2. /sys/block/rotational - leitura direta, sem subprocesso.
+            # Pontes USB costumam reportar 1 até para SSDs, então nesse caso
+            # só "0" é conclusivo e o "1" segue para o smartctl.
+            try:
+                is_rotational = cls._read_sysfs(f"/sys/block/{base}/queue/rotational").strip() == b"1"
+                if not is_rotational:
+                    return "SSD"
+                if "/usb" not in cls._sysfs_path(base):
+                    return "HDD"
+            except OSError:
+                pass
+
+            # 3. smartctl "Rotation Rate" - MAIS CONFIÁVEL para USB
             disk_type = cls._detect_by_smartctl(device)
             if disk_type:
                 return disk_type
 
-            # 3. udevadm ID_ATA_ROTATION_RATE_RPM
+            # 4. udevadm ID_ATA_ROTATION_RATE_RPM
             disk_type = cls._detect_by_udevadm(device)
             if disk_type:
                 return disk_type
 
-            # 4. Atributos SMART específicos de SSD
+            # 5. Atributos SMART específicos de SSD
             disk_type = cls._detect_by_smart_attributes(device)
             if disk_type:
                 return disk_type
 
-            # 5. Fallback: /sys/block/rotational
-            rot_file = Path(f"/sys/block/{base}/queue/rotational")
-            if rot_file.exists():
-                is_rotational = rot_file.read_text().strip() == "1"
-                return "HDD" if is_rotational else "SSD"
+            # 6. Fallback: ROTA do lsblk (snapshot)
+            if snapshot is None:
+                snapshot = cls._lsblk_snapshot()
+            rota = cls._lsblk_flag(snapshot.get(device, {}).get("rota"))
+            if rota is not None:
+                return "HDD" if rota else "SSD"
 
         except Exception as e:
             logger.debug(f"Erro detectando tipo de disco {base}: {e}")
@@ -462,63 +658,65 @@ class DiskService:
         return "Unknown"
 
     @classmethod
-    def _detect_by_smartctl(cls, device: str) -> Optional[str]:
-        """Detecta tipo via smartctl Rotation Rate"""
-        drivers_to_try = ["", "sat", "scsi"]
-
-        for driver in drivers_to_try:
-            try:
-                cmd = ["smartctl", "-i"]
-                if driver:
-                    cmd.extend(["-d", driver])
-                cmd.append(device)
+    def _run_smartctl_json(cls, device: str) -> dict:
+        """Executa smartctl -i -A em JSON uma vez por disco e guarda o resultado.
 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                output = result.stdout.lower()
-
-                # Procura "Rotation Rate"
-                if "solid state device" in output:
-                    return "SSD"
-
-                # Procura RPM (5400, 7200, etc.)
-                match = re.search(r'rotation rate:\s*(\d+)\s*rpm', output)
-                if match:
-                    rpm = int(match.group(1))
-                    if rpm > 0:
-                        return "HDD"
-
-                # Se encontrou info válida mas sem rotation rate, pode ser SSD antigo
-                if "device model" in output or "model family" in output:
-                    # Continua tentando outros métodos
-                    continue
-
-            except Exception:
-                continue
+        Usado por _get_rpm, _detect_by_smartctl e _detect_by_smart_attributes,
+        que antes abriam um processo smartctl cada (até 5 por disco).
+        """
+        now = time.time()
+        with cls._cache_lock:
+            entry = cls._smart_json_cache.get(device)
+            if entry and now - entry[0] < SMART_CACHE_TTL:
+                return entry[1]
+
+        # Uma chamada com o driver que já funcionou no SmartParser (ou -d auto);
+        # só repete com -d sat se a ponte USB não devolveu modelo nem rotação
+        driver = SmartParser.preferred_driver(device)
+        data = cls._smartctl_json_call(device, driver)
+        if not driver and "model_name" not in data and "rotation_rate" not in data:
+            data = cls._smartctl_json_call(device, "sat") or data
+
+        with cls._cache_lock:
+            cls._cache_put(cls._smart_json_cache, device, now, data)
+        return data
+
+    @staticmethod
+    def _smartctl_json_call(device: str, driver: Optional[str]) -> dict:
+        """Uma execução de smartctl -i -A --json=c ({} em caso de falha)"""
+        cmd = [SMARTCTL_PATH, "-i", "-A", "--json=c"]
+        if driver:
+            cmd.extend(["-d", driver])
+        cmd.append(device)
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=10)
+            if result.stdout:
+                return json_loads(result.stdout)
+        except Exception as e:
+            logger.debug(f"smartctl --json falhou para {device}: {e}")
+        return {}
 
-        return None
+    @classmethod
+    def _detect_by_smartctl(cls, device: str) -> Optional[str]:
+        """Detecta tipo via smartctl Rotation Rate"""
+        # rotation_rate: 0 = "Solid State Device", > 0 = RPM do HDD
+        rpm = cls._run_smartctl_json(device).get("rotation_rate")
+        if not isinstance(rpm, int):
+            return None
+        if rpm == 0:
+            return "SSD"
+        return "HDD" if rpm > 0 else None
 
     @classmethod
     def _detect_by_udevadm(cls, device: str) -> Optional[str]:
         """Detecta tipo via udevadm ID_ATA_ROTATION_RATE_RPM"""
         try:
-            result = subprocess.run(
-                ["udevadm", "info", "--query=property", f"--name={device}"],
-                capture_output=True, text=True, timeout=5
-            )
-
-            if result.returncode == 0:
-                output = result.stdout
-
-                # Procura ID_ATA_ROTATION_RATE_RPM
-                match = re.search(r'ID_ATA_ROTATION_RATE_RPM=(\d+)', output)
-                if match:
-                    rpm = int(match.group(1))
-                    if rpm == 0:
-                        return "SSD"
-                    elif rpm > 0:
-                        return "HDD"
-
-        except Exception:
+            rpm = int(cls._udev_snapshot().get(device, {})["ID_ATA_ROTATION_RATE_RPM"])
+            if rpm == 0:
+                return "SSD"
+            elif rpm > 0:
+                return "HDD"
+        except (KeyError, ValueError):
             pass
 
         return None
@@ -526,55 +724,49 @@ class DiskService:
     @classmethod
     def _detect_by_smart_attributes(cls, device: str) -> Optional[str]:
         """Detecta SSD pela presença de atributos SMART específicos de SSD"""
-        # Atributos típicos de SSD
-        ssd_attributes = {
-            170, 171, 172, 173, 174,  # NAND/Flash related
-            177,  # Wear_Leveling_Count
-            180,  # Unused_Rsvd_Blk_Cnt
-            202,  # Data_Address_Mark_Errors / Percent_Lifetime_Used
-            231,  # SSD_Life_Left / Temperature_Celsius
-            233,  # Media_Wearout_Indicator
-            234,  # AvgErase_Ct
-            241,  # Total_LBAs_Written
-            242,  # Total_LBAs_Read
-        }
+        table = cls._run_smartctl_json(device).get("ata_smart_attributes", {}).get("table", [])
 
-        try:
-            result = subprocess.run(
-                ["smartctl", "-A", device],
-                capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode in (0, 4):  # 4 = SMART ok, mas warning
-                output = result.stdout
-
-                # Procura por atributos de SSD
-                for attr_id in ssd_attributes:
-                    # Formato: "177 Wear_Leveling_Count" ou similar
-                    if re.search(rf'^\s*{attr_id}\s+\w', output, re.MULTILINE):
-                        return "SSD"
-
-                # Procura por palavras-chave de SSD nos nomes dos atributos
-                ssd_keywords = ['wear_level', 'nand', 'flash', 'ssd_life', 'media_wearout']
-                output_lower = output.lower()
-                for keyword in ssd_keywords:
-                    if keyword in output_lower:
-                        return "SSD"
-
-        except Exception:
-            pass
+        # Uma passada: id típico de SSD ou palavra-chave de SSD no nome
+        for attr in table:
+            if attr.get("id") in _SSD_ATTR_IDS or _RE_SSD_ATTR_NAME.search(str(attr.get("name", ""))):
+                return "SSD"
 
         return None
 
+    @staticmethod
+    def _cache_put(cache: OrderedDict, device: str, now: float, data) -> None:
+        """Grava no fim do cache (mantém ordem por timestamp) e limita o tamanho"""
+        cache[device] = (now, data)
+        cache.move_to_end(device)
+        while len(cache) > SMART_CACHE_MAXLEN:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def _evict_expired(cache: OrderedDict, now: float, max_age: int) -> None:
+        """Remove do início enquanto expirado; para no primeiro ainda válido"""
+        while cache:
+            ts, _ = next(iter(cache.values()))
+            if now - ts <= max_age:
+                break
+            cache.popitem(last=False)
+
     @classmethod
     def clear_cache(cls):
-        cls._smart_cache.clear()
-        cls._cache_timestamp.clear()
+        with cls._cache_lock:
+            cls._smart_cache.clear()
+            cls._smart_json_cache.clear()
+            cls._lsblk_cache = {}
+            cls._lsblk_timestamp = 0
+            cls._udev_cache = {}
+            cls._udev_timestamp = 0
+            cls._sysfs_path_cache.clear()
+            cls._profile_cache.clear()
+        SmartParser.clear_cache()
 
     @classmethod
     def clear_old_cache(cls, max_age: int = 300):
         now = time.time()
-        expired = [dev for dev, ts in cls._cache_timestamp.items() if now - ts > max_age]
-        for dev in expired:
-            cls._smart_cache.pop(dev, None)
-            cls._cache_timestamp.pop(dev, None)
\ No newline at end of file
+        with cls._cache_lock:
+            cls._sysfs_path_cache.clear()
+            cls._evict_expired(cls._smart_cache, now, max_age)
+            cls._evict_expired(cls._smart_json_cache, now, max_age)
\ No newline at end of file
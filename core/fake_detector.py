@@ -1,18 +1,47 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
+import os
 import subprocess
+import sys
 import re
 import logging
-from dataclasses import dataclass, field
-from typing import Optional, List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional, List, Tuple
 from enum import Enum
 from pathlib import Path
 
-from core.config import HDPARM_PATH, F3PROBE_PATH
+from core.config import SMARTCTL_PATH, HDPARM_PATH, F3PROBE_PATH, LSBLK_PATH, FDISK_PATH
 
 logger = logging.getLogger(__name__)
 
+# Cache curto de _collect_capacities (quick_check repetido no mesmo disco)
+CAPACITY_CACHE_TTL = 2.0
+CAPACITY_CACHE_MAXLEN = 64
+
+# Tempo máximo do f3probe (--time=5m)
+F3PROBE_TIMEOUT = 300
+
+_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+# Padrões de _collect_capacities, compilados uma vez
+# fdisk: "Disk /dev/sdb: 14.32 GiB, 15376318464 bytes, 30031872 sectors"
+_RE_FDISK_BYTES = re.compile(r'Disk\s+\S+:\s+[^,]+,\s*(\d+)\s+bytes')
+_RE_SMART_CAP = re.compile(r'User Capacity:\s+([\d,]+) bytes')
+# hdparm -N: " max sectors   = 1953523055/1953525168, HPA is enabled" (atual/nativo)
+# ou as variantes "native max sectors: N" / "current max sectors: N"; uma passada só.
+# Pontes USB costumam responder "max sectors = N/1(N?), HPA setting seems invalid":
+# essa linha é ignorada (o nativo não é confiável)
+_RE_HDPARM_SECTORS = re.compile(
+    r'native.*max sectors:\s*(?P<native>\d+)'
+    r'|current max sectors:\s*(?P<current>\d+)'
+    r'|max\s+sectors\s*=\s*(?P<cur2>\d+)\s*/\s*(?P<nat2>\d+)(?![^\n]*HPA setting seems invalid)'
+)
+
 class FakeStatus(Enum):
     GENUINE = "genuine"
     SUSPICIOUS = "suspicious"
@@ -27,7 +56,21 @@ class TestResult(Enum):
     SKIPPED = "skipped"
     ERROR = "error"
 
-@dataclass
+# slots=True só existe a partir do Python 3.10 (ainda suportamos 3.8)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Resumos exibidos por _calculate_final_status
+_SUMMARY_FAKE_CONFIRMED = "🔴 DISCO FALSO CONFIRMADO pelo f3probe"
+_SUMMARY_FAKE_LIKELY = "🔴 ALTA PROBABILIDADE DE FALSIFICAÇÃO"
+_SUMMARY_SUSPICIOUS = "🟡 SUSPEITO - Recomendado teste completo"
+_SUMMARY_SOME_SUSPECT = "🟡 Algumas características suspeitas"
+_SUMMARY_GENUINE = "🟢 Parece autêntico (recomendado f3probe para 100%)"
+_SUMMARY_UNKNOWN = "⚪ Não foi possível determinar"
+
+# Status que pedem confirmação com f3probe
+_NEEDS_F3PROBE = frozenset({FakeStatus.SUSPICIOUS, FakeStatus.UNKNOWN})
+
+@dataclass(**_DATACLASS_SLOTS)
 class CapacityInfo:
     lsblk_bytes: int = 0
     fdisk_bytes: int = 0
@@ -41,29 +84,35 @@ class CapacityInfo:
 
     def has_hpa(self) -> bool:
         if self.hdparm_native_sectors > 0 and self.hdparm_max_sectors > 0:
-            return self.hdparm_native_sectors != self.hdparm_max_sectors
+            return self.hdparm_native_sectors > self.hdparm_max_sectors
         return False
 
     def get_hpa_size_bytes(self) -> int:
         if self.has_hpa():
-            return (self.hdparm_max_sectors - self.hdparm_native_sectors) * 512
+            return (self.hdparm_native_sectors - self.hdparm_max_sectors) * 512
         return 0
 
     def has_capacity_mismatch(self, tolerance_pct: float = 5.0) -> bool:
-        values = [v for v in [self.lsblk_bytes, self.fdisk_bytes, self.smart_bytes] if v > 0]
-        if len(values) < 2:
+        # Mínimo/máximo das fontes preenchidas numa passada, sem lista intermediária
+        count = max_val = min_val = 0
+        for v in (self.lsblk_bytes, self.fdisk_bytes, self.smart_bytes):
+            if v <= 0:
+                continue
+            count += 1
+            if count == 1:
+                max_val = min_val = v
+            elif v > max_val:
+                max_val = v
+            elif v < min_val:
+                min_val = v
+
+        if count < 2:
             return False
 
-        max_val = max(values)
-        min_val = min(values)
+        # (max - min) / max * 100 > tolerância, sem divisão
+        return (max_val - min_val) * 100 > tolerance_pct * max_val
 
-        if max_val == 0:
-            return False
-
-        diff_pct = ((max_val - min_val) / max_val) * 100
-        return diff_pct > tolerance_pct
-
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class FakeTestResult:
     name: str
     result: TestResult
@@ -71,7 +120,7 @@ class FakeTestResult:
     details: str = ""
     is_destructive: bool = False
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class FakeDetectorReport:
     device: str
     status: FakeStatus = FakeStatus.UNTESTED
@@ -87,12 +136,25 @@ class FakeDetectorReport:
         self.tests.append(test)
 
     def get_failed_tests(self) -> List[FakeTestResult]:
-        return [t for t in self.tests if t.result == TestResult.FAILED]
+        return [t for t in self.tests if t.result is TestResult.FAILED]
 
     def get_warnings(self) -> List[FakeTestResult]:
-        return [t for t in self.tests if t.result == TestResult.WARNING]
+        return [t for t in self.tests if t.result is TestResult.WARNING]
 
 class FakeDetector:
+    # (device, st_rdev) -> (monotonic, CapacityInfo); evita repetir os 4 subprocessos
+    _capacity_cache: Dict[Tuple[str, int], Tuple[float, CapacityInfo]] = {}
+    _capacity_lock = threading.Lock()
+    # Executáveis que deram FileNotFoundError (cache negativo)
+    _missing_tools: set = set()
+
+    @classmethod
+    def invalidate(cls, device: str):
+        """Descarta capacidades em cache do dispositivo (ex: após f3fix/wipe)"""
+        with cls._capacity_lock:
+            for key in [k for k in cls._capacity_cache if k[0] == device]:
+                del cls._capacity_cache[key]
+
     @classmethod
     def quick_check(cls, device: str) -> FakeDetectorReport:
         report = FakeDetectorReport(device=device)
@@ -117,47 +179,123 @@ class FakeDetector:
 
         if allow_destructive:
             f3_result = cls._run_f3probe(device)
+            # f3probe escreve no disco: capacidades em cache deixam de valer
+            cls.invalidate(device)
             report.add_test(f3_result)
             cls._calculate_final_status(report)
 
         return report
 
-    @classmethod
-    def _collect_capacities(cls, device: str) -> CapacityInfo:
-        cap = CapacityInfo()
+    @staticmethod
+    def _read_sysfs_size(device: str) -> int:
+        """Tamanho em bytes via /sys/class/block/<nome>/size (setores de 512), 0 se indisponível"""
+        try:
+            with open(f"/sys/class/block/{os.path.basename(device)}/size", "rb") as f:
+                return int(f.read()) * 512
+        except (OSError, ValueError):
+            return 0
 
+    @classmethod
+    def _run_capture(cls, cmd: List[str], merge_stderr: bool = False) -> Optional[str]:
+        """stdout do comando, ou None se falhou/retornou erro"""
+        # Ferramenta ausente não aparece no meio da sessão: nem tenta de novo
+        if cmd[0] in cls._missing_tools:
+            return None
         try:
-            out = subprocess.check_output(["lsblk", "-b", "-o", "SIZE", device], text=True)
-            cap.lsblk_bytes = int(out.strip().splitlines()[-1].strip())
-        except:
-            pass
+            result = subprocess.run(
+                cmd, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT if merge_stderr else subprocess.DEVNULL,
+                text=True, timeout=20
+            )
+            if result.returncode == 0:
+                return result.stdout
+        except FileNotFoundError:
+            logger.debug("Ferramenta não encontrada: %s", cmd[0])
+            cls._missing_tools.add(cmd[0])
+        except (OSError, subprocess.SubprocessError, UnicodeDecodeError) as e:
+            logger.debug("Falha executando %s: %s", cmd[0], e)
+        return None
 
+    @classmethod
+    def _collect_capacities(cls, device: str) -> CapacityInfo:
+        # st_rdev na chave: outro disco no mesmo nome não reaproveita o resultado
         try:
-            out = subprocess.check_output(["fdisk", "-l", device], text=True, stderr=subprocess.STDOUT)
-            m = re.search(r'Disk .*?: (\d+)', out)
+            key = (device, os.stat(device).st_rdev)
+        except OSError:
+            key = (device, 0)
+
+        now = time.monotonic()
+        with cls._capacity_lock:
+            entry = cls._capacity_cache.get(key)
+            if entry and now - entry[0] < CAPACITY_CACHE_TTL:
+                return replace(entry[1])
+
+        cap = cls._probe_capacities(device)
+
+        with cls._capacity_lock:
+            cls._capacity_cache.pop(key, None)
+            # Inserção em ordem de tempo: a entrada mais antiga é a primeira
+            while len(cls._capacity_cache) >= CAPACITY_CACHE_MAXLEN:
+                del cls._capacity_cache[next(iter(cls._capacity_cache))]
+            cls._capacity_cache[key] = (now, cap)
+        return replace(cap)
+
+    @classmethod
+    def _probe_capacities(cls, device: str) -> CapacityInfo:
+        cap = CapacityInfo()
+
+        # Tamanho visto pelo kernel: é o que lsblk lê do sysfs e o fdisk obtém
+        # via ioctl, então uma leitura de /sys/class/block cobre os dois.
+        # Os subprocessos só entram quando o dispositivo não tem entrada no sysfs.
+        sysfs_bytes = cls._read_sysfs_size(device)
+        cap.lsblk_bytes = cap.fdisk_bytes = sysfs_bytes
+
+        # SMART e hdparm consultam o próprio disco; rodam em paralelo
+        cmds = {
+            "smart": ([SMARTCTL_PATH, "-i", device], False),
+            "hdparm": ([HDPARM_PATH, "-N", device], False),
+        }
+        if not sysfs_bytes:
+            cmds["lsblk"] = ([LSBLK_PATH, "-b", "-d", "-n", "-o", "SIZE", device], False)
+            cmds["fdisk"] = ([FDISK_PATH, "-l", device], True)
+
+        with ThreadPoolExecutor(max_workers=len(cmds)) as executor:
+            futures = {
+                name: executor.submit(cls._run_capture, cmd, merge)
+                for name, (cmd, merge) in cmds.items()
+            }
+            outputs = {name: future.result() for name, future in futures.items()}
+
+        out = outputs.get("lsblk")
+        if out:
+            try:
+                cap.lsblk_bytes = int(out.strip().splitlines()[-1].strip())
+            except (ValueError, IndexError):
+                pass
+
+        out = outputs.get("fdisk")
+        if out:
+            m = _RE_FDISK_BYTES.search(out)
             if m:
                 cap.fdisk_bytes = int(m.group(1))
-        except:
-            pass
 
-        try:
-            out = subprocess.check_output([SMARTCTL_PATH, "-i", device], text=True)
-            m = re.search(r'User Capacity:\s+([\d,]+) bytes', out)
+        out = outputs["smart"]
+        if out:
+            m = _RE_SMART_CAP.search(out)
             if m:
                 cap.smart_bytes = int(m.group(1).replace(',', ''))
-        except:
-            pass
 
-        try:
-            out = subprocess.check_output([HDPARM_PATH, "-N", device], text=True)
-            m_native = re.search(r'native.*max sectors:\s*(\d+)', out)
-            m_max = re.search(r'current max sectors:\s*(\d+)', out)
-            if m_native:
-                cap.hdparm_native_sectors = int(m_native.group(1))
-            if m_max:
-                cap.hdparm_max_sectors = int(m_max.group(1))
-        except:
-            pass
+        out = outputs["hdparm"]
+        if out:
+            for m in _RE_HDPARM_SECTORS.finditer(out):
+                native = m.group("native") or m.group("nat2")
+                current = m.group("current") or m.group("cur2")
+                if native and not cap.hdparm_native_sectors:
+                    cap.hdparm_native_sectors = int(native)
+                if current and not cap.hdparm_max_sectors:
+                    cap.hdparm_max_sectors = int(current)
+                if cap.hdparm_native_sectors and cap.hdparm_max_sectors:
+                    break
 
         cap.lsblk_human = cls._bytes_to_human(cap.lsblk_bytes)
         cap.fdisk_human = cls._bytes_to_human(cap.fdisk_bytes)
@@ -207,13 +345,42 @@ class FakeDetector:
     @classmethod
     def _run_f3probe(cls, device: str) -> FakeTestResult:
         try:
-            result = subprocess.run(
+            proc = subprocess.Popen(
                 [F3PROBE_PATH, "--time=5m", device],
-                capture_output=True, text=True, timeout=300
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
             )
-            output = result.stdout + result.stderr
-
-            if "seems to be" in output.lower() and "fake" in output.lower():
+            # Orçamento de 300s: o watchdog mata o processo e o laço abaixo termina
+            timed_out = threading.Event()
+
+            def _kill():
+                timed_out.set()
+                proc.kill()
+
+            watchdog = threading.Timer(F3PROBE_TIMEOUT, _kill)
+            watchdog.start()
+
+            # Lê linha a linha, classificando à medida que chega. Não encerra no
+            # veredito: a geometria e o "--last-sec" sugerido vêm depois dele.
+            lines = []
+            seems_to_be = has_fake = has_real = False
+            try:
+                for line in proc.stdout:
+                    lines.append(line)
+                    low = line.lower()
+                    seems_to_be = seems_to_be or "seems to be" in low
+                    has_fake = has_fake or "fake" in low
+                    has_real = has_real or "real" in low or "genuine" in low
+                proc.wait()
+            finally:
+                watchdog.cancel()
+                proc.stdout.close()
+
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(proc.args, F3PROBE_TIMEOUT)
+
+            output = "".join(lines)
+
+            if seems_to_be and has_fake:
                 return FakeTestResult(
                     name="f3probe",
                     result=TestResult.FAILED,
@@ -221,7 +388,7 @@ class FakeDetector:
                     details=output,
                     is_destructive=True
                 )
-            elif "real" in output.lower() or "genuine" in output.lower():
+            elif has_real:
                 return FakeTestResult(
                     name="f3probe",
                     result=TestResult.PASSED,
@@ -257,42 +424,51 @@ class FakeDetector:
 
     @classmethod
     def _calculate_final_status(cls, report: FakeDetectorReport):
-        failed = report.get_failed_tests()
-        warnings = report.get_warnings()
-        passed = [t for t in report.tests if t.result == TestResult.PASSED]
-
-        fail_points = len(failed) * 30
-        warn_points = len(warnings) * 10
-        pass_points = len(passed) * 20
-
-        if any(t.name == "f3probe" and t.result == TestResult.FAILED for t in failed):
+        # Uma passada só: contagens por resultado e o caso f3probe reprovado
+        n_failed = n_warnings = n_passed = 0
+        f3probe_failed = False
+        for t in report.tests:
+            if t.result is TestResult.FAILED:
+                n_failed += 1
+                if t.name == "f3probe":
+                    f3probe_failed = True
+            elif t.result is TestResult.WARNING:
+                n_warnings += 1
+            elif t.result is TestResult.PASSED:
+                n_passed += 1
+
+        fail_points = n_failed * 30
+        warn_points = n_warnings * 10
+        pass_points = n_passed * 20
+
+        if f3probe_failed:
             report.status = FakeStatus.FAKE
             report.confidence = 100
-            report.summary = "🔴 DISCO FALSO CONFIRMADO pelo f3probe"
-        elif len(failed) >= 2:
+            report.summary = _SUMMARY_FAKE_CONFIRMED
+        elif n_failed >= 2:
             report.status = FakeStatus.FAKE
             report.confidence = min(90, 50 + fail_points)
-            report.summary = "🔴 ALTA PROBABILIDADE DE FALSIFICAÇÃO"
-        elif failed:
+            report.summary = _SUMMARY_FAKE_LIKELY
+        elif n_failed:
             report.status = FakeStatus.SUSPICIOUS
             report.confidence = min(70, 30 + fail_points + warn_points)
-            report.summary = "🟡 SUSPEITO - Recomendado teste completo"
-        elif warnings:
+            report.summary = _SUMMARY_SUSPICIOUS
+        elif n_warnings:
             report.status = FakeStatus.SUSPICIOUS
             report.confidence = min(50, 20 + warn_points)
-            report.summary = "🟡 Algumas características suspeitas"
-        elif passed:
+            report.summary = _SUMMARY_SOME_SUSPECT
+        elif n_passed:
             report.status = FakeStatus.GENUINE
             report.confidence = min(80, pass_points)
-            report.summary = "🟢 Parece autêntico (recomendado f3probe para 100%)"
+            report.summary = _SUMMARY_GENUINE
         else:
             report.status = FakeStatus.UNKNOWN
             report.confidence = 0
-            report.summary = "⚪ Não foi possível determinar"
+            report.summary = _SUMMARY_UNKNOWN
 
         report.recommendations = []
 
-        if report.status in [FakeStatus.SUSPICIOUS, FakeStatus.UNKNOWN]:
+        if report.status in _NEEDS_F3PROBE:
             report.recommendations.append(
                 "Execute o teste f3probe para confirmação definitiva "
                 "(ATENÇÃO: apaga todos os dados!)"
@@ -301,10 +477,10 @@ class FakeDetector:
         if report.capacity.has_hpa():
             report.recommendations.append(
                 "Área protegida (HPA) detectada. Pode ser desabilitada com: "
-                f"sudo hdparm --yes-i-know-what-i-am-doing -N p{report.capacity.hdparm_max_sectors} {report.device}"
+                f"sudo hdparm --yes-i-know-what-i-am-doing -N p{report.capacity.hdparm_native_sectors} {report.device}"
             )
 
-        if report.status == FakeStatus.FAKE:
+        if report.status is FakeStatus.FAKE:
             report.recommendations.append(
                 "NÃO use este disco para armazenar dados importantes!"
             )
@@ -314,13 +490,13 @@ class FakeDetector:
 
     @staticmethod
     def _bytes_to_human(size_bytes: int) -> str:
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if abs(size_bytes) < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} PB"
+        # Unidade = bits acima de 2^10k, sem laço de divisões
+        idx = min(max(abs(int(size_bytes)).bit_length() - 1, 0) // 10, len(_UNITS) - 1)
+        return f"{size_bytes / (1 << (idx * 10)):.2f} {_UNITS[idx]}"
+
+# Variantes pré-ligadas de check_fake
+_QUICK_CHECK = FakeDetector.quick_check
+_FULL_CHECK = functools.partial(FakeDetector.full_check, allow_destructive=True)
 
 def check_fake(device: str, full: bool = False) -> FakeDetectorReport:
-    if full:
-        return FakeDetector.full_check(device, allow_destructive=True)
-    return FakeDetector.quick_check(device)
\ No newline at end of file
+    return _FULL_CHECK(device) if full else _QUICK_CHECK(device)
\ No newline at end of file
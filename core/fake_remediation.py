@@ -11,22 +11,40 @@ A UI chama aqui e só exibe progresso/resultado.
 
 from __future__ import annotations
 
+import fcntl
+import functools
 import json
 import logging
 import os
+import struct
 import subprocess
 import time
 from dataclasses import asdict
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
+try:
+    import orjson  # opcional, serialização bem mais rápida
+except ImportError:
+    orjson = None
+
 from core.config import F3FIX_PATH, WIPEFS_PATH, UDEVADM_PATH, REPORT_DIR
+from core.fake_detector import FakeDetector
 
 logger = logging.getLogger(__name__)
 
 
-def run_cmd(cmd: List[str], timeout: Optional[int] = None) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+def run_cmd(
+    cmd: List[str], timeout: Optional[int] = None, capture_stderr: bool = True
+) -> subprocess.CompletedProcess:
+    # capture_stderr=False descarta o stderr (um pipe a menos) quando ninguém vai lê-lo
+    return subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if capture_stderr else subprocess.DEVNULL,
+        encoding="utf-8", errors="replace",
+        timeout=timeout,
+    )
 
 
 def build_f3fix_command(device: str, last_sec: int) -> List[str]:
@@ -34,6 +52,14 @@ def build_f3fix_command(device: str, last_sec: int) -> List[str]:
     return [F3FIX_PATH, f"--last-sec={last_sec}", device]
 
 
+def run_f3fix(device: str, last_sec: int, timeout: int = 60) -> subprocess.CompletedProcess:
+    """Executa o f3fix e descarta as capacidades em cache (a tabela de partição muda)"""
+    try:
+        return run_cmd(build_f3fix_command(device, last_sec), timeout=timeout)
+    finally:
+        FakeDetector.invalidate(device)
+
+
 def wipe_signatures_commands(device: str) -> List[List[str]]:
     # Limpa assinaturas e tabela de partição (rápido). Não escreve o disco inteiro.
     # 1) wipefs -a: remove assinaturas conhecidas (fs, RAID, etc)
@@ -44,16 +70,59 @@ def wipe_signatures_commands(device: str) -> List[List[str]]:
     ]
 
 
+# ioctl que zera um intervalo do block device no próprio kernel: _IO(0x12, 127)
+BLKZEROOUT = 0x127F
+WIPE_HEAD_MB = 32
+
+
+def wipe_head(device: str, mb: int = WIPE_HEAD_MB) -> None:
+    """Zera os primeiros `mb` MiB do dispositivo sem subprocesso (equivale ao dd acima)"""
+    length = mb * 1024 * 1024
+    fd = os.open(device, os.O_WRONLY | os.O_CLOEXEC)
+    try:
+        try:
+            fcntl.ioctl(fd, BLKZEROOUT, struct.pack("QQ", 0, length))
+        except OSError:
+            # Não é block device ou o kernel/driver não suporta: escreve zeros
+            buf = bytes(1024 * 1024)
+            for offset in range(0, length, len(buf)):
+                os.pwrite(fd, buf, offset)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def wipe_signatures(device: str, timeout: int = 60) -> List[subprocess.CompletedProcess]:
+    """Executa a limpeza de wipe_signatures_commands: wipefs + zerar o início em processo"""
+    results = [run_cmd([WIPEFS_PATH, "-a", device], timeout=timeout)]
+    args = ["wipe_head", device, f"{WIPE_HEAD_MB}MiB"]
+    try:
+        wipe_head(device)
+        results.append(subprocess.CompletedProcess(args, 0, "", ""))
+    except OSError as e:
+        logger.error("Falha ao zerar início de %s: %s", device, e)
+        results.append(subprocess.CompletedProcess(args, 1, "", str(e)))
+    FakeDetector.invalidate(device)
+    return results
+
+
+@functools.lru_cache(maxsize=None)
+def _udevadm_available() -> bool:
+    # Checado uma vez por processo (use .cache_clear() para reavaliar)
+    return bool(UDEVADM_PATH) and os.path.isfile(UDEVADM_PATH) and os.access(UDEVADM_PATH, os.X_OK)
+
+
 def collect_udev_properties(device: str) -> Dict[str, str]:
-    if not UDEVADM_PATH or not Path(UDEVADM_PATH).exists():
+    if not _udevadm_available():
         return {}
     try:
-        p = run_cmd([UDEVADM_PATH, "info", "--query=property", "--name", device], timeout=10)
+        p = run_cmd([UDEVADM_PATH, "info", "--query=property", "--name", device], timeout=10, capture_stderr=False)
         props: Dict[str, str] = {}
+        # Saída do udevadm é "CHAVE=valor" sem espaços extras
         for line in (p.stdout or "").splitlines():
-            if "=" in line:
-                k, v = line.split("=", 1)
-                props[k.strip()] = v.strip()
+            k, sep, v = line.partition("=")
+            if sep:
+                props[k] = v
         return props
     except Exception:
         return {}
@@ -79,5 +148,9 @@ def export_fake_evidence_json(
         "udev": collect_udev_properties(device),
         "tests": session_results,
     }
-    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Evidência é lida por pessoas (disputa/devolução): mantém indentação
+    if orjson is not None:
+        out_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
     return out_path
@@ -4,12 +4,19 @@
 HealthScore - Cálculo de pontuação de saúde do disco
 """
 
+import sys
+from bisect import bisect_right
+from collections import namedtuple
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import List, Tuple
 from enum import Enum
 
 from core.smart_parser import SmartData, SmartStatus
 
+# slots=True só existe a partir do Python 3.10 (ainda suportamos 3.8)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class HealthLevel(Enum):
     """Níveis de saúde do disco"""
@@ -21,7 +28,7 @@ class HealthLevel(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class HealthReport:
     """Relatório de saúde do disco"""
     score: int  # 0-100
@@ -87,6 +94,40 @@ VENDOR_WEIGHTS = {
     }
 }
 
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
+class VendorWeights:
+    """Pesos de um vendor (padrões iguais aos de "default")"""
+    reallocated: int = 35
+    pending: int = 35
+    uncorrectable: int = 40
+    reallocated_event: int = 20
+    crc: int = 15
+    poh: int = 10
+
+
+# Atributo SMART -> campo de VendorWeights
+_WEIGHT_FIELDS = {
+    "Reallocated_Sector_Ct": "reallocated",
+    "Current_Pending_Sector": "pending",
+    "Offline_Uncorrectable": "uncorrectable",
+    "Reallocated_Event_Count": "reallocated_event",
+    "UDMA_CRC_Error_Count": "crc",
+    "Power_On_Hours": "poh",
+}
+
+class _VendorWeightMap(dict):
+    """dict por vendor que devolve a entrada "default" para vendors desconhecidos"""
+
+    def __missing__(self, key):
+        return self["default"]
+
+
+VENDOR_WEIGHTS_FROZEN = _VendorWeightMap(
+    (vendor, VendorWeights(**{_WEIGHT_FIELDS[attr]: w for attr, w in weights.items()}))
+    for vendor, weights in VENDOR_WEIGHTS.items()
+)
+
 # Limites de horas para diferentes níveis de alerta
 POH_THRESHOLDS = {
     "warning": 25000,   # 2.8 anos 24/7
@@ -103,6 +144,102 @@ TEMP_THRESHOLDS = {
 }
 
 
+# Mensagens fixas (as que dependem de valores são templates nas regras abaixo)
+_FACTOR_HEALTH_FAILED = ("SMART Health FALHOU", -50, "critical")
+_MSG_HEALTH_FAILED = "BACKUP IMEDIATO! Disco pode falhar a qualquer momento."
+_MSG_UNCORRECTABLE = "Setores incorrigíveis indicam dano permanente. Faça backup!"
+_MSG_ALL_GOOD = "Disco em bom estado. Continue monitorando periodicamente."
+
+# Regra de penalidade: o primeiro degrau (limite, fração, status, recomendação)
+# com valor > limite define a penalidade int(peso * fração); sem degrau, sem penalidade.
+# `weight` é um campo de VendorWeights ou um peso fixo (int).
+# Com `ramp`, a penalidade cresce proporcionalmente até o peso cheio em valor == ramp.
+HealthRule = namedtuple("HealthRule", "getter weight tiers factor ramp", defaults=(None,))
+
+
+def _crc_errors(smart: SmartData) -> int:
+    attr = smart.get_attr(199)
+    return attr.raw_value if attr else 0
+
+
+HEALTH_RULES = (
+    # Setores realocados
+    HealthRule(
+        attrgetter("reallocated_sectors"), "reallocated",
+        (
+            (100, 1.0, "critical",
+             "Alto número de setores realocados ({v}). Considere substituir o disco."),
+            (10, 0.7, "warning",
+             "Setores realocados detectados ({v}). Monitore regularmente."),
+            (0, 0.3, "warning", None),
+        ),
+        "Setores realocados: {v}",
+    ),
+    # Setores pendentes
+    HealthRule(
+        attrgetter("pending_sectors"), "pending",
+        (
+            (10, 1.0, "critical",
+             "ALERTA: {v} setores pendentes! Execute badblocks ou SMART extended test."),
+            (0, 0.5, "warning", None),
+        ),
+        "Setores pendentes: {v}",
+    ),
+    # Setores incorrigíveis
+    HealthRule(
+        attrgetter("uncorrectable_sectors"), "uncorrectable",
+        (
+            (5, 1.0, "critical", _MSG_UNCORRECTABLE),
+            (0, 1.0, "warning", _MSG_UNCORRECTABLE),
+        ),
+        "Setores incorrigíveis: {v}",
+        ramp=5,
+    ),
+    # Horas de uso
+    HealthRule(
+        attrgetter("power_on_hours"), "poh",
+        (
+            (POH_THRESHOLDS["critical"], 1.0, "warning",
+             "Disco com {v:,} horas de uso. Considere substituição preventiva."),
+            (POH_THRESHOLDS["concern"], 0.6, "info", None),
+            (POH_THRESHOLDS["warning"], 0.3, "info", None),
+        ),
+        "Horas de uso: {v:,}h",
+    ),
+    # Temperatura (peso fixo, não depende do vendor: 15/10/5 pontos)
+    HealthRule(
+        lambda smart: smart.temperature or 0, 5,
+        (
+            (TEMP_THRESHOLDS["hot"], 3, "critical",
+             "Temperatura CRÍTICA: {v}°C! Melhore a ventilação imediatamente."),
+            (TEMP_THRESHOLDS["warm"], 2, "warning",
+             "Temperatura alta: {v}°C. Verifique ventilação."),
+            (TEMP_THRESHOLDS["good"], 1, "info", None),
+        ),
+        "Temperatura: {v}°C",
+    ),
+    # Erros CRC UDMA
+    HealthRule(
+        _crc_errors, "crc",
+        (
+            (100, 1.0, "warning",
+             "Muitos erros CRC ({v}). Verifique cabo SATA/USB."),
+            (0, 0.5, "info", None),
+        ),
+        "Erros CRC: {v}",
+    ),
+)
+
+# Pesos de cada regra por vendor, alinhados com HEALTH_RULES
+_RULE_WEIGHTS = _VendorWeightMap(
+    (vendor, tuple(
+        getattr(weights, rule.weight) if isinstance(rule.weight, str) else rule.weight
+        for rule in HEALTH_RULES
+    ))
+    for vendor, weights in VENDOR_WEIGHTS_FROZEN.items()
+)
+
+
 def calculate_health(smart: SmartData) -> HealthReport:
     """
     Calcula pontuação de saúde baseada em dados SMART
@@ -117,147 +254,33 @@ def calculate_health(smart: SmartData) -> HealthReport:
     factors = []
     recommendations = []
     
-    # Obtém pesos do vendor ou usa default
-    weights = VENDOR_WEIGHTS.get(smart.vendor, VENDOR_WEIGHTS["default"])
-    
-    # 1. SMART Health Status
+    # SMART Health Status
     if not smart.health_passed:
         score -= 50
-        factors.append(("SMART Health FALHOU", -50, "critical"))
-        recommendations.append("BACKUP IMEDIATO! Disco pode falhar a qualquer momento.")
-    
-    # 2. Setores realocados
-    if smart.reallocated_sectors > 0:
-        weight = weights.get("Reallocated_Sector_Ct", 35)
-        
-        if smart.reallocated_sectors > 100:
-            penalty = weight
-            status = "critical"
-            recommendations.append(
-                f"Alto número de setores realocados ({smart.reallocated_sectors}). "
-                "Considere substituir o disco."
-            )
-        elif smart.reallocated_sectors > 10:
-            penalty = int(weight * 0.7)
-            status = "warning"
-            recommendations.append(
-                f"Setores realocados detectados ({smart.reallocated_sectors}). "
-                "Monitore regularmente."
-            )
-        else:
-            penalty = int(weight * 0.3)
-            status = "warning"
-        
-        score -= penalty
-        factors.append((f"Setores realocados: {smart.reallocated_sectors}", -penalty, status))
+        factors.append(_FACTOR_HEALTH_FAILED)
+        recommendations.append(_MSG_HEALTH_FAILED)
     
-    # 3. Setores pendentes
-    if smart.pending_sectors > 0:
-        weight = weights.get("Current_Pending_Sector", 35)
-        
-        if smart.pending_sectors > 10:
-            penalty = weight
-            status = "critical"
-            recommendations.append(
-                f"ALERTA: {smart.pending_sectors} setores pendentes! "
-                "Execute badblocks ou SMART extended test."
-            )
+    # Demais fatores: uma passada pela tabela de regras com os pesos do vendor
+    weights = _RULE_WEIGHTS[smart.vendor]
+    for rule, weight in zip(HEALTH_RULES, weights):
+        value = rule.getter(smart)
+        if value <= 0:
+            continue
+        for limit, fraction, status, recommendation in rule.tiers:
+            if value > limit:
+                break
         else:
-            penalty = int(weight * 0.5)
-            status = "warning"
-        
-        score -= penalty
-        factors.append((f"Setores pendentes: {smart.pending_sectors}", -penalty, status))
-    
-    # 4. Setores incorrigíveis
-    if smart.uncorrectable_sectors > 0:
-        weight = weights.get("Offline_Uncorrectable", 40)
-        
-        penalty = min(weight, weight * (smart.uncorrectable_sectors / 5))
-        status = "critical" if smart.uncorrectable_sectors > 5 else "warning"
-        
-        score -= int(penalty)
-        factors.append((
-            f"Setores incorrigíveis: {smart.uncorrectable_sectors}", 
-            -int(penalty), 
-            status
-        ))
-        
-        if smart.uncorrectable_sectors > 0:
-            recommendations.append(
-                "Setores incorrigíveis indicam dano permanente. Faça backup!"
-            )
-    
-    # 5. Horas de uso
-    poh = smart.power_on_hours
-    if poh > 0:
-        weight = weights.get("Power_On_Hours", 10)
+            continue
         
-        if poh > POH_THRESHOLDS["critical"]:
-            penalty = weight
-            status = "warning"
-            recommendations.append(
-                f"Disco com {poh:,} horas de uso. Considere substituição preventiva."
-            )
-        elif poh > POH_THRESHOLDS["concern"]:
-            penalty = int(weight * 0.6)
-            status = "info"
-        elif poh > POH_THRESHOLDS["warning"]:
-            penalty = int(weight * 0.3)
-            status = "info"
+        if rule.ramp:
+            penalty = int(min(weight, weight * (value / rule.ramp)))
         else:
-            penalty = 0
-            status = "good"
-        
-        if penalty > 0:
-            score -= penalty
-            factors.append((f"Horas de uso: {poh:,}h", -penalty, status))
-    
-    # 6. Temperatura
-    if smart.temperature:
-        temp = smart.temperature
-        
-        if temp > TEMP_THRESHOLDS["hot"]:
-            penalty = 15
-            status = "critical"
-            recommendations.append(
-                f"Temperatura CRÍTICA: {temp}°C! Melhore a ventilação imediatamente."
-            )
-        elif temp > TEMP_THRESHOLDS["warm"]:
-            penalty = 10
-            status = "warning"
-            recommendations.append(
-                f"Temperatura alta: {temp}°C. Verifique ventilação."
-            )
-        elif temp > TEMP_THRESHOLDS["good"]:
-            penalty = 5
-            status = "info"
-        else:
-            penalty = 0
-            status = "good"
-        
-        if penalty > 0:
-            score -= penalty
-            factors.append((f"Temperatura: {temp}°C", -penalty, status))
-    
-    # 7. Erros CRC UDMA
-    crc_attr = smart.get_attr(199)
-    if crc_attr and crc_attr.raw_value > 0:
-        weight = weights.get("UDMA_CRC_Error_Count", 15)
-        
-        if crc_attr.raw_value > 100:
-            penalty = weight
-            status = "warning"
-            recommendations.append(
-                f"Muitos erros CRC ({crc_attr.raw_value}). "
-                "Verifique cabo SATA/USB."
-            )
-        else:
-            penalty = int(weight * 0.5)
-            status = "info"
+            penalty = int(weight * fraction)
         
         score -= penalty
-        factors.append((f"Erros CRC: {crc_attr.raw_value}", -penalty, status))
+        factors.append((rule.factor.format(v=value), -penalty, status))
+        if recommendation:
+            recommendations.append(recommendation.format(v=value))
     
     # Limita score
     score = max(0, min(100, score))
@@ -267,7 +290,7 @@ def calculate_health(smart: SmartData) -> HealthReport:
     
     # Adiciona recomendação genérica se tudo OK
     if not recommendations:
-        recommendations.append("Disco em bom estado. Continue monitorando periodicamente.")
+        recommendations.append(_MSG_ALL_GOOD)
     
     return HealthReport(
         score=score,
@@ -280,18 +303,20 @@ def calculate_health(smart: SmartData) -> HealthReport:
     )
 
 
+# Faixas de score (limite inferior de cada nível acima de CRITICAL) e seus labels
+_LEVEL_THRESHOLDS = (25, 50, 75, 90)
+_LEVELS = (
+    (HealthLevel.CRITICAL, "Crítico", "#ff4757", "🔴"),
+    (HealthLevel.POOR, "Ruim", "#ff6b6b", "🟠"),
+    (HealthLevel.FAIR, "Atenção", "#ffa502", "🟡"),
+    (HealthLevel.GOOD, "Bom", "#2ed573", "🟢"),
+    (HealthLevel.EXCELLENT, "Excelente", "#2ed573", "🟢"),
+)
+
+
 def _get_level_info(score: int) -> tuple:
     """Retorna informações de nível baseado no score"""
-    if score >= 90:
-        return HealthLevel.EXCELLENT, "Excelente", "#2ed573", "🟢"
-    elif score >= 75:
-        return HealthLevel.GOOD, "Bom", "#2ed573", "🟢"
-    elif score >= 50:
-        return HealthLevel.FAIR, "Atenção", "#ffa502", "🟡"
-    elif score >= 25:
-        return HealthLevel.POOR, "Ruim", "#ff6b6b", "🟠"
-    else:
-        return HealthLevel.CRITICAL, "Crítico", "#ff4757", "🔴"
+    return _LEVELS[bisect_right(_LEVEL_THRESHOLDS, score)]
 
 
 def health_status(score: int) -> str:
@@ -4,17 +4,30 @@
 SmartParser - Parser SMART completo com suporte multi-vendor
 """
 
+import json
+import os
 import subprocess
+import sys
 import re
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from dataclasses import dataclass, field
 from typing import Dict, Optional, List, Tuple
 from enum import Enum
+from types import MappingProxyType
 
-from core.config import SMARTCTL_PATH
+from core.config import SMARTCTL_PATH, DRIVERS_CACHE_FILE, SMART_CACHE_TTL
 
 logger = logging.getLogger(__name__)
 
+PARSE_CACHE_MAXLEN = 64
+SMARTCTL_TIMEOUT = 15
+# Bytes do início da saída do smartctl usados para validá-la
+VALID_OUTPUT_HEAD = 4096
+
 
 class SmartStatus(Enum):
     """Status de atributos SMART"""
@@ -49,13 +62,13 @@ SMART_ATTRIBUTES = {
 }
 
 # Atributos críticos que indicam problemas sérios
-CRITICAL_ATTRIBUTES = {5, 10, 187, 196, 197, 198}
+CRITICAL_ATTRIBUTES = frozenset({5, 10, 187, 196, 197, 198})
 
 # Atributos de atenção
-WARNING_ATTRIBUTES = {1, 7, 188, 199, 200}
+WARNING_ATTRIBUTES = frozenset({1, 7, 188, 199, 200})
 
-# Assinaturas de vendors
-VENDOR_SIGNATURES = {
+# Assinaturas de vendors (somente leitura: _VENDOR_RE é montado a partir delas no import)
+VENDOR_SIGNATURES = MappingProxyType({
     "WDC": "Western Digital",
     "WD": "Western Digital",
     "Seagate": "Seagate",
@@ -69,10 +82,50 @@ VENDOR_SIGNATURES = {
     "Kingston": "Kingston",
     "Crucial": "Crucial",
     "Intel": "Intel",
-}
-
-
-@dataclass
+})
+
+# Todas as assinaturas numa só alternação (mais longas primeiro: "WDC" antes de "WD")
+_VENDOR_RE = re.compile(
+    "|".join(re.escape(s) for s in sorted(VENDOR_SIGNATURES, key=len, reverse=True)),
+    re.IGNORECASE
+)
+_VENDOR_MAP = {s.lower(): v for s, v in VENDOR_SIGNATURES.items()}
+
+# slots=True só existe a partir do Python 3.10 (ainda suportamos 3.8)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Padrões do smartctl, compilados uma vez
+_RE_MODEL = re.compile(r"(?:Device Model|Model Number|Product):\s+(.+)")
+_RE_SERIAL = re.compile(r"Serial Number:\s+(.+)")
+_RE_FIRMWARE = re.compile(r"Firmware Version:\s+(.+)")
+_RE_CAPACITY = re.compile(r"User Capacity:\s+(.+?)(?:\s+\[|$)")
+_RE_NVME_TEMP = re.compile(r'Temperature:\s+(\d+)\s*(?:Celsius|C)', re.IGNORECASE)
+_RE_NVME_POH = re.compile(r'Power On Hours:\s+([\d,]+)')
+_RE_NVME_PC = re.compile(r'Power Cycles:\s+([\d,]+)')
+# Padrões: "Temperature:                        34 Celsius" ou "temperature 34"
+_RE_TEMP_FALLBACK = re.compile(
+    r'(?:Current Drive )?Temperature:\s*(\d+)|temperature[:\s]+(\d+)', re.IGNORECASE
+)
+
+# Linha de atributo (varre o output inteiro; [ \t] para não atravessar linhas):
+# ID# ATTRIBUTE_NAME          FLAG     VALUE WORST THRESH TYPE      UPDATED  WHEN_FAILED RAW_VALUE
+_RE_ATTR_ROW = re.compile(
+    r'^[ \t]*(\d+)[ \t]+'     # ID
+    r'(\S+)[ \t]+'            # Nome
+    r'0x[0-9a-f]+[ \t]+'      # Flag (hex)
+    r'(\d+)[ \t]+'            # Value
+    r'(\d+)[ \t]+'            # Worst
+    r'(\d+)[ \t]+'            # Threshold
+    r'\S+[ \t]+'              # Type
+    r'\S+[ \t]+'              # Updated
+    r'\S+[ \t]+'              # When_Failed
+    r'(\d+)',                 # Raw Value (primeiro número)
+    re.MULTILINE | re.IGNORECASE
+)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SmartAttribute:
     """Representa um atributo SMART"""
     id: int
@@ -89,7 +142,7 @@ class SmartAttribute:
         return self.value <= self.threshold and self.threshold > 0
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SmartData:
     """Dados SMART completos de um disco"""
     device: str = ""
@@ -181,46 +234,107 @@ class SmartParser:
     # Drivers ordenados por prioridade
     SMART_DRIVERS = ["", "sat", "scsi", "ata", "usbjmicron", "nvme"]
 
+    # device -> driver que funcionou da última vez (persistido entre execuções)
+    _driver_cache: Dict[str, str] = {}
+    _driver_cache_loaded = False
+    _driver_lock = threading.Lock()
+
+    # device -> (timestamp monotônico, SmartData) das últimas leituras
+    _parse_cache: "OrderedDict[str, Tuple[float, SmartData]]" = OrderedDict()
+    _parse_lock = threading.Lock()
+
     @classmethod
-    def parse(cls, device: str) -> SmartData:
-        """Faz parse completo dos dados SMART de um dispositivo"""
-        smart = SmartData(device=device)
+    def _load_driver_cache(cls):
+        """Carrega o cache de drivers do disco na primeira consulta"""
+        with cls._driver_lock:
+            if cls._driver_cache_loaded:
+                return
+            cls._driver_cache_loaded = True
+            try:
+                with open(DRIVERS_CACHE_FILE, encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    cls._driver_cache.update(
+                        (dev, drv) for dev, drv in data.items() if drv in cls.SMART_DRIVERS
+                    )
+            except (OSError, ValueError):
+                pass
 
-        # Tenta diferentes drivers
-        output = None
-        used_driver = ""
+    @classmethod
+    def preferred_driver(cls, device: str) -> Optional[str]:
+        """Driver que funcionou da última vez para o dispositivo (None se desconhecido)"""
+        cls._load_driver_cache()
+        return cls._driver_cache.get(device)
 
-        for driver in cls.SMART_DRIVERS:
+    @classmethod
+    def _remember_driver(cls, device: str, driver: str):
+        """Grava o driver vencedor (arquivo só é reescrito quando muda)"""
+        with cls._driver_lock:
+            if cls._driver_cache.get(device) == driver:
+                return
+            cls._driver_cache[device] = driver
+            tmp_file = DRIVERS_CACHE_FILE.with_suffix(".tmp")
             try:
-                cmd = [SMARTCTL_PATH, "-a"]
-                if driver:
-                    cmd.extend(["-d", driver])
-                cmd.append(device)
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(cls._driver_cache, f)
+                os.replace(tmp_file, DRIVERS_CACHE_FILE)
+            except OSError:
+                pass
 
-                result = subprocess.run(
-                    cmd, capture_output=True, text=True, timeout=15
-                )
+    @classmethod
+    def parse(cls, device: str, ttl: float = SMART_CACHE_TTL, keep_raw: bool = False) -> SmartData:
+        """Dados SMART do dispositivo, reaproveitando a leitura dos últimos `ttl` segundos.
+
+        ttl=0 força nova leitura. O SmartData retornado é compartilhado entre
+        chamadas dentro da janela e não deve ser modificado. A saída bruta do
+        smartctl só fica em raw_output com keep_raw=True.
+        """
+        now = time.monotonic()
+        if ttl > 0:
+            with cls._parse_lock:
+                entry = cls._parse_cache.get(device)
+                if entry and now - entry[0] < ttl and (entry[1].raw_output or not keep_raw):
+                    return entry[1]
+
+        smart = cls._read(device, keep_raw)
+
+        # Falhas não entram no cache: a próxima consulta tenta de novo
+        if smart is None:
+            return SmartData(device=device)
+        with cls._parse_lock:
+            cls._parse_cache[device] = (now, smart)
+            cls._parse_cache.move_to_end(device)
+            while len(cls._parse_cache) > PARSE_CACHE_MAXLEN:
+                cls._parse_cache.popitem(last=False)
+        return smart
 
-                # Verifica se obteve dados válidos
-                if result.stdout and ("SMART" in result.stdout or "Model" in result.stdout):
-                    # Verifica se não tem erro de USB bridge
-                    if "Unknown USB bridge" not in result.stdout:
-                        output = result.stdout
-                        used_driver = driver
-                        break
+    @classmethod
+    def clear_cache(cls):
+        """Descarta as leituras memorizadas"""
+        with cls._parse_lock:
+            cls._parse_cache.clear()
 
-            except subprocess.TimeoutExpired:
-                continue
-            except Exception as e:
-                logger.warning(f"Erro com driver {driver}: {e}")
-                continue
+    @classmethod
+    def _read(cls, device: str, keep_raw: bool = False) -> Optional[SmartData]:
+        """Executa smartctl e faz parse completo dos dados SMART (None se nenhum driver funcionou)"""
+        # O último driver que funcionou roda sozinho; se falhar, os demais correm em paralelo
+        preferred = cls.preferred_driver(device)
+        used_driver, output = None, None
+        if preferred is not None:
+            used_driver, output = cls._probe_drivers(device, [preferred])
+        if not output:
+            used_driver, output = cls._probe_drivers(
+                device, [d for d in cls.SMART_DRIVERS if d != preferred]
+            )
 
         if not output:
             logger.error(f"Não foi possível ler SMART de {device}")
-            return smart
+            return None
 
-        smart.raw_output = output
-        smart.driver = used_driver
+        smart = SmartData(device=device, driver=used_driver)
+        if keep_raw:
+            smart.raw_output = output
+        cls._remember_driver(device, used_driver)
 
         # Parse das informações básicas
         cls._parse_device_info(smart, output)
@@ -230,32 +344,120 @@ class SmartParser:
 
         return smart
 
+    @staticmethod
+    def _is_valid_output(stdout: str) -> bool:
+        """Saída com dados SMART (USB bridge desconhecida já é descartada em _read_output)
+
+        "SMART"/"Model" aparecem no cabeçalho; não precisa varrer o dump inteiro.
+        """
+        head = stdout[:VALID_OUTPUT_HEAD]
+        return "SMART" in head or "Model" in head
+
+    @classmethod
+    def _probe_drivers(cls, device: str, drivers: List[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Roda smartctl com todos os drivers ao mesmo tempo.
+
+        Retorna (driver, output) do sucesso de maior prioridade (ordem de
+        `drivers`), sem esperar pelos de prioridade menor; os processos que
+        sobrarem são encerrados.
+        """
+        procs: Dict[str, subprocess.Popen] = {}
+        for driver in drivers:
+            cmd = [SMARTCTL_PATH, "-a"]
+            if driver:
+                cmd.extend(["-d", driver])
+            cmd.append(device)
+            try:
+                procs[driver] = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                )
+            except Exception as e:
+                logger.warning(f"Erro com driver {driver}: {e}")
+
+        if not procs:
+            return None, None
+
+        finished: Dict[str, Optional[str]] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=len(procs)) as pool:
+                futures = {pool.submit(cls._read_output, proc): drv for drv, proc in procs.items()}
+                try:
+                    for future in as_completed(futures, timeout=SMARTCTL_TIMEOUT):
+                        stdout = future.result()
+                        finished[futures[future]] = stdout if cls._is_valid_output(stdout) else None
+                        # Decide assim que todos os drivers de prioridade maior terminaram
+                        for driver in drivers:
+                            if driver not in procs:
+                                continue
+                            if driver not in finished:
+                                break
+                            if finished[driver]:
+                                return driver, finished[driver]
+                except FuturesTimeout:
+                    pass
+                finally:
+                    for proc in procs.values():
+                        if proc.poll() is None:
+                            proc.kill()
+        except Exception as e:
+            logger.warning(f"Erro ao consultar SMART de {device}: {e}")
+
+        # Timeout: fica com o melhor sucesso entre os que terminaram
+        for driver in drivers:
+            if finished.get(driver):
+                return driver, finished[driver]
+        return None, None
+
+    @staticmethod
+    def _read_output(proc: subprocess.Popen) -> str:
+        """stdout do processo lido por linhas ('' em erro, timeout ou USB bridge desconhecida)
+
+        Encerra o smartctl assim que a bridge USB é recusada, sem esperar o resto
+        da saída. O timeout vem de _probe_drivers, que mata o processo.
+        """
+        lines = []
+        try:
+            for line in proc.stdout:
+                if "Unknown USB bridge" in line:
+                    proc.kill()
+                    lines = []
+                    break
+                lines.append(line)
+            proc.stdout.close()
+            proc.wait(timeout=SMARTCTL_TIMEOUT)
+        except Exception:
+            proc.kill()
+            return ""
+        # Morto por sinal (timeout ou descarte): saída parcial não serve
+        if proc.returncode < 0:
+            return ""
+        return "".join(lines)
+
     @classmethod
     def _parse_device_info(cls, smart: SmartData, output: str):
         """Extrai informações do dispositivo"""
         # Modelo
-        match = re.search(r"(?:Device Model|Model Number|Product):\s+(.+)", output)
+        match = _RE_MODEL.search(output)
         if match:
             smart.model = match.group(1).strip()
 
         # Detecta vendor pelo modelo
-        for sig, vendor in VENDOR_SIGNATURES.items():
-            if sig.lower() in smart.model.lower():
-                smart.vendor = vendor
-                break
+        match = _VENDOR_RE.search(smart.model)
+        if match:
+            smart.vendor = _VENDOR_MAP[match.group(0).lower()]
 
         # Serial
-        match = re.search(r"Serial Number:\s+(.+)", output)
+        match = _RE_SERIAL.search(output)
         if match:
             smart.serial = match.group(1).strip()
 
         # Firmware
-        match = re.search(r"Firmware Version:\s+(.+)", output)
+        match = _RE_FIRMWARE.search(output)
         if match:
             smart.firmware = match.group(1).strip()
 
         # Capacidade
-        match = re.search(r"User Capacity:\s+(.+?)(?:\s+\[|$)", output)
+        match = _RE_CAPACITY.search(output)
         if match:
             smart.capacity = match.group(1).strip()
 
@@ -273,54 +475,36 @@ class SmartParser:
     @classmethod
     def _parse_attributes(cls, smart: SmartData, output: str):
         """Extrai atributos SMART"""
-        # Padrão para linha de atributo:
-        # ID# ATTRIBUTE_NAME          FLAG     VALUE WORST THRESH TYPE      UPDATED  WHEN_FAILED RAW_VALUE
-        pattern = re.compile(
-            r'^\s*(\d+)\s+'           # ID
-            r'(\S+)\s+'               # Nome
-            r'0x[0-9a-f]+\s+'         # Flag (hex)
-            r'(\d+)\s+'               # Value
-            r'(\d+)\s+'               # Worst
-            r'(\d+)\s+'               # Threshold
-            r'\S+\s+'                 # Type
-            r'\S+\s+'                 # Updated
-            r'\S+\s+'                 # When_Failed
-            r'(\d+)',                 # Raw Value (primeiro número)
-            re.IGNORECASE
-        )
-
-        for line in output.splitlines():
-            match = pattern.match(line)
-            if match:
-                attr_id = int(match.group(1))
-                name = match.group(2)
-                value = int(match.group(3))
-                worst = int(match.group(4))
-                threshold = int(match.group(5))
-                raw_value = int(match.group(6))
-
-                # Pega descrição do mapeamento ou usa o nome
-                attr_info = SMART_ATTRIBUTES.get(attr_id, (name, name))
-
-                # Determina status
-                status = SmartStatus.OK
-                if attr_id in CRITICAL_ATTRIBUTES and raw_value > 0:
-                    status = SmartStatus.CRITICAL
-                elif attr_id in WARNING_ATTRIBUTES and raw_value > 100:
-                    status = SmartStatus.WARNING
-                elif value <= threshold and threshold > 0:
-                    status = SmartStatus.CRITICAL
-
-                smart.attributes[attr_id] = SmartAttribute(
-                    id=attr_id,
-                    name=attr_info[0],
-                    description=attr_info[1],
-                    value=value,
-                    worst=worst,
-                    threshold=threshold,
-                    raw_value=raw_value,
-                    status=status
-                )
+        for match in _RE_ATTR_ROW.finditer(output):
+            attr_id = int(match.group(1))
+            name = match.group(2)
+            value = int(match.group(3))
+            worst = int(match.group(4))
+            threshold = int(match.group(5))
+            raw_value = int(match.group(6))
+
+            # Pega descrição do mapeamento ou usa o nome
+            attr_info = SMART_ATTRIBUTES.get(attr_id, (name, name))
+
+            # Determina status
+            status = SmartStatus.OK
+            if attr_id in CRITICAL_ATTRIBUTES and raw_value > 0:
+                status = SmartStatus.CRITICAL
+            elif attr_id in WARNING_ATTRIBUTES and raw_value > 100:
+                status = SmartStatus.WARNING
+            elif value <= threshold and threshold > 0:
+                status = SmartStatus.CRITICAL
+
+            smart.attributes[attr_id] = SmartAttribute(
+                id=attr_id,
+                name=attr_info[0],
+                description=attr_info[1],
+                value=value,
+                worst=worst,
+                threshold=threshold,
+                raw_value=raw_value,
+                status=status
+            )
 
         # Parse especial para NVMe (formato diferente)
         if not smart.attributes:
@@ -330,71 +514,59 @@ class SmartParser:
     def _parse_nvme_attributes(cls, smart: SmartData, output: str):
         """Parse especial para discos NVMe"""
         # Temperature
-        match = re.search(r'Temperature:\s+(\d+)\s*(?:Celsius|C)', output, re.IGNORECASE)
+        match = _RE_NVME_TEMP.search(output)
         if match:
             smart.temperature = int(match.group(1))
 
         # Power On Hours
-        match = re.search(r'Power On Hours:\s+([\d,]+)', output)
+        match = _RE_NVME_POH.search(output)
         if match:
             smart.power_on_hours = int(match.group(1).replace(',', ''))
 
         # Power Cycles
-        match = re.search(r'Power Cycles:\s+([\d,]+)', output)
+        match = _RE_NVME_PC.search(output)
         if match:
             smart.power_cycles = int(match.group(1).replace(',', ''))
 
     @classmethod
     def _extract_metrics(cls, smart: SmartData, output: str):
         """Extrai métricas importantes dos atributos e do output"""
+        attrs = smart.attributes
+
         # Temperatura - tenta múltiplas fontes
         if not smart.temperature:
-            # 1. Atributo 194 (Temperature_Celsius)
-            temp_attr = smart.get_attr(194)
-            if temp_attr and 0 < temp_attr.raw_value < 100:
-                smart.temperature = temp_attr.raw_value
-
-            # 2. Atributo 190 (Airflow_Temperature)
-            if not smart.temperature:
-                temp_attr = smart.get_attr(190)
+            # 1. Atributos 194 (Temperature_Celsius) e 190 (Airflow_Temperature)
+            for attr_id in (194, 190):
+                temp_attr = attrs.get(attr_id)
                 if temp_attr and 0 < temp_attr.raw_value < 100:
                     smart.temperature = temp_attr.raw_value
+                    break
 
-            # 3. Busca direta no output
+            # 2. Busca direta no output ("Temperature: N" ou "temperature N"), uma varredura
             if not smart.temperature:
-                # Padrão: "Temperature:                        34 Celsius"
-                match = re.search(r'(?:Current Drive )?Temperature:\s*(\d+)\s*(?:Celsius|C|°C)?', output, re.IGNORECASE)
+                match = _RE_TEMP_FALLBACK.search(output)
                 if match:
-                    temp = int(match.group(1))
+                    temp = int(match.group(1) or match.group(2))
                     if 0 < temp < 100:
                         smart.temperature = temp
 
-            # 4. Busca por "temperature" seguido de número
-            if not smart.temperature:
-                match = re.search(r'temperature[:\s]+(\d+)', output, re.IGNORECASE)
-                if match:
-                    temp = int(match.group(1))
-                    if 0 < temp < 100:
-                        smart.temperature = temp
-
-        # Horas de uso
+        # Horas de uso e ciclos de energia (NVMe já preenche pelo output)
         if not smart.power_on_hours:
-            poh_attr = smart.get_attr(9)
+            poh_attr = attrs.get(9)
             if poh_attr:
                 smart.power_on_hours = poh_attr.raw_value
 
-        # Ciclos de energia
         if not smart.power_cycles:
-            pc_attr = smart.get_attr(12)
+            pc_attr = attrs.get(12)
             if pc_attr:
                 smart.power_cycles = pc_attr.raw_value
 
-        # Setores problemáticos
-        smart.reallocated_sectors = smart.get_attr_raw(5, 0)
-        smart.pending_sectors = smart.get_attr_raw(197, 0)
-        smart.uncorrectable_sectors = smart.get_attr_raw(198, 0)
+        # Setores problemáticos (realocados, pendentes, incorrigíveis)
+        smart.reallocated_sectors, smart.pending_sectors, smart.uncorrectable_sectors = (
+            attr.raw_value if attr else 0 for attr in map(attrs.get, (5, 197, 198))
+        )
 
 
-def parse_smart(device: str) -> SmartData:
-    """Função de conveniência para parse SMART"""
-    return SmartParser.parse(device)
\ No newline at end of file
+def parse_smart(device: str, ttl: float = SMART_CACHE_TTL, keep_raw: bool = False) -> SmartData:
+    """Função de conveniência para parse SMART (ttl=0 força nova leitura)"""
+    return SmartParser.parse(device, ttl, keep_raw)
\ No newline at end of file
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import atexit
+import mmap
+import os
 import subprocess
 import threading
 import time
 import logging
 import re
 import random
-import psutil
+import selectors
+import tempfile
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import nullcontext
 from dataclasses import dataclass, field, asdict
-from typing import Optional, Callable, List, Dict, Any
+from typing import Optional, Callable, List, Dict, Any, Tuple
 from enum import Enum, auto
 from pathlib import Path
 
 from core.config import (
     SMARTCTL_PATH, BADBLOCKS_PATH, F3PROBE_PATH,
-    BADBLOCKS_BLOCK_SIZE, BADBLOCKS_BLOCKS_AT_ONCE
+    BADBLOCKS_BLOCK_SIZE, BADBLOCKS_BLOCKS_AT_ONCE, LOG_DIR
 )
 from core.smart_parser import SmartParser, SmartData
 from core.health_score import calculate_health, HealthReport
@@ -23,6 +31,64 @@ from core.fake_detector import FakeDetector, FakeDetectorReport
 
 logger = logging.getLogger(__name__)
 
+# Padrões de saída das ferramentas externas, compilados uma vez
+_RE_SELFTEST_PCT = re.compile(r'(\d+)%\s*(?:remaining|completed)')
+_RE_BADBLOCKS_PCT = re.compile(r'(\d+\.?\d*)%\s*done')
+# O progresso do badblocks -s é reescrito com backspaces, sem quebra de linha
+_RE_PROGRESS_SPLIT = re.compile(r'[\r\n\x08]+')
+# f3probe: todos os campos numa alternação (o grupo final identifica o campo)
+_RE_F3PROBE_FIELDS = re.compile(
+    r"\*Usable\* size:\s*(?P<usable>[0-9.]+\s*\w+)\s*\((?P<usable_blocks>\d+)\s*blocks\)"
+    r"|Announced size:\s*(?P<announced>[0-9.]+\s*\w+)\s*\((?P<announced_blocks>\d+)\s*blocks\)"
+    r"|Module:\s*(?P<module>[0-9.]+\s*\w+)"
+    r"|Physical block size:\s*(?P<phys>[0-9.]+)\s*Byte"
+    r"|--last-sec=(?P<last_sec>\d+)"
+)
+# smartctl --scan-open: "/dev/sdb -d sat # /dev/sdb [SAT], ATA device" (falhas começam com #)
+_RE_SCAN_DRIVER = re.compile(r'^(/dev/\S+)\s+-d\s+(\S+)', re.MULTILINE)
+# Disco base de uma partição: /dev/sda1 -> /dev/sda, /dev/nvme0n1p2 -> /dev/nvme0n1
+_DEV_BASE = re.compile(r'^(/dev/(?:sd[a-z]+|hd[a-z]+|vd[a-z]+|nvme\d+n\d+|mmcblk\d+))(?:p?\d+)?$')
+
+# slots=True só existe a partir do Python 3.10 (ainda suportamos 3.8)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Tempo máximo (s) do smartctl --scan-open (abre todos os dispositivos)
+SMARTCTL_SCAN_TIMEOUT = 30
+
+# Testes de um mesmo lote compatível executados ao mesmo tempo
+PARALLEL_TESTS_MAX = 4
+
+# Linhas finais do stdout do badblocks mantidas em TestResult.details
+BADBLOCKS_TAIL_LINES = 200
+
+# Idade máxima (s) da leitura SMART reaproveitada entre testes da mesma sessão
+SESSION_SMART_MAX_AGE = 10.0
+
+# Lock neutro para o caminho sequencial de _run_and_record
+_NO_LOCK = nullcontext()
+
+
+def _parse_done_pct(text: str) -> Optional[float]:
+    """Percentual de "  0.42% done, 0:03 elapsed." (None se ausente)"""
+    i = text.find("% done")
+    if i > 0:
+        try:
+            return float(text[text.rfind(" ", 0, i) + 1:i])
+        except ValueError:
+            pass
+    # Formatos incomuns (outro espaçamento): cai no regex
+    m = _RE_BADBLOCKS_PCT.search(text)
+    return float(m.group(1)) if m else None
+
+
+def _mounted_devices() -> List[str]:
+    """Dispositivos montados, lidos direto de /proc/mounts (primeiro campo de cada linha)
+
+    Erro de leitura propaga: sem saber o que está montado, o teste não deve rodar.
+    """
+    with open("/proc/mounts", encoding="utf-8", errors="replace") as f:
+        return [line.split(" ", 1)[0] for line in f if line.strip()]
+
 
 def format_duration(seconds: float) -> str:
     """Formata duração em formato legível"""
@@ -54,7 +120,7 @@ class TestStatus(Enum):
     SKIPPED = "skipped"
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class TestDefinition:
     id: str
     name: str
@@ -63,9 +129,11 @@ class TestDefinition:
     estimated_time: str
     is_destructive: bool = False
     requires_unmount: bool = False
+    # Testes consecutivos da mesma fase e do mesmo grupo rodam em paralelo (None = sozinho)
+    compatible_group: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class TestResult:
     test_id: str
     status: TestStatus
@@ -76,7 +144,7 @@ class TestResult:
     progress: int = 100
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class TestSession:
     device: str
     tests_to_run: List[TestDefinition] = field(default_factory=list)
@@ -92,6 +160,12 @@ class TestSession:
 
     _current_process: Optional[subprocess.Popen] = None
 
+    # Última leitura SMART da sessão (timestamp monotônico, dados), compartilhada entre testes
+    _smart_cache: Optional[Tuple[float, SmartData]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _smart_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False)
+
 
 AVAILABLE_TESTS = {
     "smart_info": TestDefinition(
@@ -99,21 +173,24 @@ AVAILABLE_TESTS = {
         name="Informações SMART",
         description="Coleta informações básicas e status SMART",
         phase=TestPhase.PHASE_1_QUICK,
-        estimated_time="2s"
+        estimated_time="2s",
+        compatible_group="smart_read"
     ),
     "health_check": TestDefinition(
         id="health_check",
         name="Verificação de Saúde",
         description="Calcula pontuação de saúde baseada em SMART",
         phase=TestPhase.PHASE_1_QUICK,
-        estimated_time="2s"
+        estimated_time="2s",
+        compatible_group="smart_read"
     ),
     "fake_quick": TestDefinition(
         id="fake_quick",
         name="Detecção Rápida de Fake",
         description="Verifica HPA e consistência de capacidade",
         phase=TestPhase.PHASE_1_QUICK,
-        estimated_time="5s"
+        estimated_time="5s",
+        compatible_group="smart_read"
     ),
     "smart_short": TestDefinition(
         id="smart_short",
@@ -182,28 +259,101 @@ AVAILABLE_TESTS = {
 
 
 class TestRunner:
+    # Pool compartilhado pelos lotes paralelos de todas as sessões (criado sob demanda)
+    _io_pool: Optional[ThreadPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def _get_pool(cls) -> ThreadPoolExecutor:
+        with cls._pool_lock:
+            if cls._io_pool is None:
+                cls._io_pool = ThreadPoolExecutor(max_workers=PARALLEL_TESTS_MAX,
+                                                  thread_name_prefix="testrunner-io")
+                atexit.register(cls._io_pool.shutdown, wait=False)
+            return cls._io_pool
+
     @classmethod
     def run_tests(cls, session: TestSession):
         session.is_running = True
-        for test_def in session.tests_to_run:
+        for batch in cls._batches(session.tests_to_run):
             if session.is_cancelled:
                 break
-            session.current_test = test_def.id
+            if len(batch) == 1:
+                cls._run_and_record(session, batch[0])
+            else:
+                cls._run_parallel(session, batch)
 
-            if session.on_progress:
-                session.on_progress(test_def.id, 0, f"Iniciando {test_def.name}...")
+        session.is_running = False
+        session.current_test = None
 
-            result = cls._run_single_test(session, test_def.id)
-            session.results[test_def.id] = result
+        if session.on_session_complete:
+            session.on_session_complete()
 
+    @staticmethod
+    def _batches(tests: List[TestDefinition]) -> List[List[TestDefinition]]:
+        """Agrupa testes consecutivos compatíveis (mesma fase e grupo, sem escrita/desmontagem)"""
+        batches: List[List[TestDefinition]] = []
+        for test_def in tests:
+            parallel = (test_def.compatible_group is not None
+                        and not test_def.is_destructive and not test_def.requires_unmount)
+            if parallel and batches:
+                prev = batches[-1][-1]
+                if (prev.compatible_group == test_def.compatible_group
+                        and prev.phase is test_def.phase
+                        and not prev.is_destructive and not prev.requires_unmount):
+                    batches[-1].append(test_def)
+                    continue
+            batches.append([test_def])
+        return batches
+
+    @classmethod
+    def _run_and_record(cls, session: TestSession, test_def: TestDefinition,
+                        lock: Optional[threading.Lock] = None):
+        """Executa um teste e registra o resultado (sob `lock` quando em paralelo)"""
+        session.current_test = test_def.id
+
+        if session.on_progress:
+            session.on_progress(test_def.id, 0, f"Iniciando {test_def.name}...")
+
+        result = cls._run_single_test(session, test_def.id)
+
+        # Escrita no disco invalida a leitura SMART da sessão e as capacidades em cache
+        if test_def.is_destructive:
+            session._smart_cache = None
+            FakeDetector.invalidate(session.device)
+
+        with lock or _NO_LOCK:
+            session.results[test_def.id] = result
             if session.on_test_complete:
                 session.on_test_complete(result)
 
-        session.is_running = False
-        session.current_test = None
+    @classmethod
+    def _run_parallel(cls, session: TestSession, batch: List[TestDefinition]):
+        """Executa um grupo de testes compatíveis ao mesmo tempo"""
+        lock = threading.Lock()
+        on_progress = session.on_progress
+        if on_progress:
+            def locked_progress(*args):
+                with lock:
+                    on_progress(*args)
+            session.on_progress = locked_progress
 
-        if session.on_session_complete:
-            session.on_session_complete()
+        try:
+            pool = cls._get_pool()
+            futures = [pool.submit(cls._run_and_record, session, test_def, lock)
+                       for test_def in batch]
+            # Como o pool é compartilhado, espera o lote inteiro antes de propagar erros
+            wait(futures)
+            for future in futures:
+                future.result()
+        finally:
+            session.on_progress = on_progress
+
+        # Resultados na ordem de definição (relatório estável), não na de conclusão
+        with lock:
+            for test_def in batch:
+                if test_def.id in session.results:
+                    session.results[test_def.id] = session.results.pop(test_def.id)
 
     @classmethod
     def _run_single_test(cls, session: TestSession, test_id: str) -> TestResult:
@@ -242,13 +392,28 @@ class TestRunner:
                 duration_seconds=time.time() - start
             )
 
+    @classmethod
+    def _get_smart(cls, session: TestSession, max_age: float = SESSION_SMART_MAX_AGE) -> SmartData:
+        """SmartData da sessão, relido só se mais velho que `max_age` segundos.
+
+        Chamadas simultâneas (testes em paralelo) esperam a mesma leitura.
+        """
+        with session._smart_lock:
+            cached = session._smart_cache
+            now = time.monotonic()
+            if cached and now - cached[0] < max_age:
+                return cached[1]
+            smart = SmartParser.parse(session.device, ttl=max_age)
+            session._smart_cache = (now, smart)
+            return smart
+
     @classmethod
     def _test_smart_info(cls, session: TestSession, start: float) -> TestResult:
         """Coleta informações SMART"""
         if session.on_progress:
             session.on_progress("smart_info", 50, "Coletando dados SMART...")
 
-        smart = SmartParser.parse(session.device)
+        smart = cls._get_smart(session)
 
         return TestResult(
             test_id="smart_info",
@@ -264,7 +429,7 @@ class TestRunner:
         if session.on_progress:
             session.on_progress("health_check", 50, "Analisando saúde...")
 
-        smart = SmartParser.parse(session.device)
+        smart = cls._get_smart(session)
         report = calculate_health(smart)
 
         return TestResult(
@@ -299,10 +464,15 @@ class TestRunner:
         if session.on_progress:
             session.on_progress(test_id, 5, "Iniciando SMART Short Test...")
 
-        # Tenta diferentes drivers
+        # Driver conhecido (leitura SMART anterior ou --scan-open) vai primeiro;
+        # os demais só são tentados se ele falhar
         drivers = ["", "sat", "scsi", "ata"]
+        known = cls._detect_driver(session.device)
+        if known is not None:
+            drivers = [known] + [d for d in drivers if d != known]
         success = False
-        output = ""
+        # Saída mantida em bytes; só é decodificada se virar details do resultado
+        output = b""
 
         for driver in drivers:
             try:
@@ -311,13 +481,13 @@ class TestRunner:
                     cmd.extend(["-d", driver])
                 cmd.append(session.device)
 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+                result = subprocess.run(cmd, capture_output=True, timeout=30)
                 output = result.stdout + result.stderr
 
-                if "Testing has begun" in output or "Self-test routine" in output:
+                if b"Testing has begun" in output or b"Self-test routine" in output:
                     success = True
                     break
-                elif "Unknown USB bridge" not in output and result.returncode == 0:
+                elif b"Unknown USB bridge" not in output and result.returncode == 0:
                     success = True
                     break
 
@@ -328,9 +498,11 @@ class TestRunner:
                 continue
 
         if not success:
+            output = output.decode("utf-8", errors="replace")
+            output_lower = output.lower()
             # Verifica se já tem teste em andamento
-            if "aborting current test" in output.lower() or "already in progress" in output.lower():
-                match = re.search(r'(\d+)%\s*(?:remaining|completed)', output)
+            if "aborting current test" in output_lower or "already in progress" in output_lower:
+                match = _RE_SELFTEST_PCT.search(output)
                 pct = match.group(1) if match else "?"
                 return TestResult(
                     test_id=test_id,
@@ -340,7 +512,7 @@ class TestRunner:
                     duration_seconds=time.time() - start
                 )
 
-            if "Invalid" in output or "not supported" in output.lower():
+            if "Invalid" in output or "not supported" in output_lower:
                 return TestResult(
                     test_id=test_id,
                     status=TestStatus.SKIPPED,
@@ -357,12 +529,18 @@ class TestRunner:
                 duration_seconds=time.time() - start
             )
 
-        # Aguarda conclusão (~2 minutos)
+        # Aguarda conclusão (~2 minutos). O progresso segue o relógio; o log de
+        # self-test só é consultado a partir de 60s (o short test nunca termina antes),
+        # com intervalos crescentes 10, 15, 22, 33... e uma última consulta no limite.
         estimated_time = 120
+        max_wait = estimated_time + 60
+        tick = 2
+        next_poll = 60
         poll_interval = 10
+        wait_start = time.time()
         elapsed = 0
 
-        while elapsed < estimated_time + 60:
+        while elapsed < max_wait:
             if session.is_cancelled:
                 return TestResult(
                     test_id=test_id,
@@ -370,8 +548,8 @@ class TestRunner:
                     message="Cancelado pelo usuário"
                 )
 
-            time.sleep(poll_interval)
-            elapsed += poll_interval
+            time.sleep(tick)
+            elapsed = time.time() - wait_start
 
             # Calcula progresso
             progress = min(95, int(10 + (elapsed / estimated_time) * 85))
@@ -380,25 +558,35 @@ class TestRunner:
             if session.on_progress:
                 session.on_progress(test_id, progress, f"Testando... {progress}% ({time_str})")
 
+            if elapsed < next_poll:
+                continue
+            next_poll = min(elapsed + poll_interval, max_wait)
+            poll_interval = min(90, int(poll_interval * 1.5))
+
             # Verifica se completou
             try:
-                check_cmd = [SMARTCTL_PATH, "-l", "selftest", session.device]
-                check_result = subprocess.run(check_cmd, capture_output=True, text=True, timeout=15)
+                check_cmd = [SMARTCTL_PATH, "-l", "selftest"]
+                if driver:
+                    check_cmd.extend(["-d", driver])
+                check_cmd.append(session.device)
+                check_result = subprocess.run(check_cmd, capture_output=True, timeout=15)
+                check_out = check_result.stdout
 
-                if "Completed without error" in check_result.stdout:
+                if b"Completed without error" in check_out:
                     return TestResult(
                         test_id=test_id,
                         status=TestStatus.COMPLETED,
                         message="✓ SMART Short Test passou",
-                        details=check_result.stdout,
+                        details=check_out.decode("utf-8", errors="replace"),
                         duration_seconds=time.time() - start
                     )
-                elif "read failure" in check_result.stdout.lower() or "failed" in check_result.stdout.lower():
+                check_lower = check_out.lower()
+                if b"read failure" in check_lower or b"failed" in check_lower:
                     return TestResult(
                         test_id=test_id,
                         status=TestStatus.FAILED,
                         message="✗ SMART Short Test detectou problemas",
-                        details=check_result.stdout,
+                        details=check_out.decode("utf-8", errors="replace"),
                         duration_seconds=time.time() - start
                     )
             except Exception:
@@ -411,6 +599,26 @@ class TestRunner:
             duration_seconds=time.time() - start
         )
 
+    @staticmethod
+    def _detect_driver(device: str) -> Optional[str]:
+        """Driver smartctl para o dispositivo, sem tentar um por um.
+
+        Usa o driver que já funcionou na leitura SMART (cache do SmartParser);
+        se desconhecido, pergunta uma vez ao `smartctl --scan-open`.
+        """
+        driver = SmartParser.preferred_driver(device)
+        if driver is not None:
+            return driver
+        try:
+            result = subprocess.run([SMARTCTL_PATH, "--scan-open"], capture_output=True,
+                                    timeout=SMARTCTL_SCAN_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        for m in _RE_SCAN_DRIVER.finditer(result.stdout.decode("utf-8", errors="replace")):
+            if m.group(1) == device:
+                return m.group(2)
+        return None
+
     @classmethod
     def _test_read_sample(cls, session: TestSession, start: float) -> TestResult:
         """Lê amostras aleatórias do disco"""
@@ -420,49 +628,51 @@ class TestRunner:
             session.on_progress(test_id, 5, "Preparando leitura amostral...")
 
         try:
-            # Obtém tamanho do disco
-            result = subprocess.run(
-                ["blockdev", "--getsize64", session.device],
-                capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode != 0:
+            # Leitura direta (O_DIRECT) no próprio processo, sem um dd por amostra
+            try:
+                fd = os.open(session.device, os.O_RDONLY | os.O_DIRECT)
+            except OSError as e:
                 return TestResult(
                     test_id=test_id,
                     status=TestStatus.SKIPPED,
-                    message="Não foi possível obter tamanho do disco"
+                    message=f"Não foi possível abrir o disco ({e.strerror})"
                 )
 
-            disk_size = int(result.stdout.strip())
-
             # Lê 10 amostras aleatórias
             samples = 10
             sample_size = 1024 * 1024  # 1MB
             errors = 0
 
-            for i in range(samples):
-                if session.is_cancelled:
-                    return TestResult(
-                        test_id=test_id,
-                        status=TestStatus.CANCELLED,
-                        message="Cancelado"
-                    )
-
-                # Posição aleatória
-                max_offset = max(0, disk_size - sample_size)
-                offset = random.randint(0, max_offset) if max_offset > 0 else 0
-
-                progress = int(10 + (i / samples) * 85)
-                if session.on_progress:
-                    session.on_progress(test_id, progress, f"Lendo amostra {i+1}/{samples}...")
+            # mmap anônimo é alinhado à página, como O_DIRECT exige
+            buf = mmap.mmap(-1, sample_size)
+            try:
+                # Tamanho do disco pelo próprio descritor
+                disk_size = os.lseek(fd, 0, os.SEEK_END)
+
+                for i in range(samples):
+                    if session.is_cancelled:
+                        return TestResult(
+                            test_id=test_id,
+                            status=TestStatus.CANCELLED,
+                            message="Cancelado"
+                        )
+
+                    # Posição aleatória, alinhada ao tamanho da amostra
+                    max_offset = max(0, disk_size - sample_size)
+                    offset = random.randint(0, max_offset) if max_offset > 0 else 0
+                    offset -= offset % sample_size
+
+                    progress = int(10 + (i / samples) * 85)
+                    if session.on_progress:
+                        session.on_progress(test_id, progress, f"Lendo amostra {i+1}/{samples}...")
 
-                try:
-                    cmd = ["dd", f"if={session.device}", "of=/dev/null",
-                           f"bs={sample_size}", "count=1",
-                           f"skip={offset // sample_size}", "iflag=direct"]
-                    subprocess.run(cmd, capture_output=True, timeout=30)
-                except Exception:
-                    errors += 1
+                    try:
+                        os.preadv(fd, [buf], offset)
+                    except OSError:
+                        errors += 1
+            finally:
+                buf.close()
+                os.close(fd)
 
             if errors > 0:
                 return TestResult(
@@ -495,25 +705,55 @@ class TestRunner:
         if session.on_progress:
             session.on_progress(test_id, 10, "Medindo velocidade...")
 
-        try:
-            cmd = ["dd", f"if={session.device}", "of=/dev/null",
-                   "bs=1M", "count=100", "iflag=direct"]
+        # Leitura sequencial direta: 100 blocos de 1MiB com O_DIRECT num buffer
+        # alinhado (mmap), cronometrada aqui mesmo, sem dd nem parse de texto
+        block_size = 1024 * 1024
+        blocks = 100
+        timeout = 60
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        try:
+            fd = os.open(session.device, os.O_RDONLY | os.O_DIRECT)
+            buf = mmap.mmap(-1, block_size)
+            total = 0
+            try:
+                t0 = time.monotonic_ns()
+                for i in range(blocks):
+                    if session.is_cancelled:
+                        return TestResult(
+                            test_id=test_id,
+                            status=TestStatus.CANCELLED,
+                            message="Cancelado"
+                        )
+
+                    n = os.readv(fd, [buf])
+                    total += n
+                    if n < block_size:
+                        break
+
+                    if (time.monotonic_ns() - t0) / 1e9 > timeout:
+                        return TestResult(
+                            test_id=test_id,
+                            status=TestStatus.FAILED,
+                            message="Timeout - disco muito lento",
+                            duration_seconds=time.time() - start
+                        )
+
+                    if session.on_progress and i % 10 == 9:
+                        session.on_progress(test_id, 10 + (i + 1) * 80 // blocks, "Medindo velocidade...")
+                elapsed_ns = time.monotonic_ns() - t0
+            finally:
+                buf.close()
+                os.close(fd)
 
             if session.on_progress:
                 session.on_progress(test_id, 90, "Calculando resultado...")
 
-            # Extrai velocidade do output
-            output = result.stderr
-            speed_match = re.search(r'([\d.]+)\s*(MB|GB)/s', output)
+            elapsed = elapsed_ns / 1e9
+            details = f"{total} bytes lidos em {elapsed:.3f} s (O_DIRECT, blocos de {block_size} bytes)"
 
-            if speed_match:
-                speed = float(speed_match.group(1))
-                unit = speed_match.group(2)
-
-                if unit == "GB":
-                    speed *= 1024
+            if total and elapsed_ns:
+                # MB decimais, como o dd reportava
+                speed = total / 1e6 / elapsed
 
                 # Avalia velocidade
                 if speed > 100:
@@ -529,7 +769,7 @@ class TestRunner:
                     test_id=test_id,
                     status=TestStatus.COMPLETED,
                     message=f"Velocidade: {speed:.1f} MB/s ({status_msg})",
-                    details=output,
+                    details=details,
                     data={"speed_mbps": speed, "rating": status_msg},
                     duration_seconds=time.time() - start
                 )
@@ -538,17 +778,10 @@ class TestRunner:
                 test_id=test_id,
                 status=TestStatus.COMPLETED,
                 message="Teste concluído",
-                details=output,
+                details=details,
                 duration_seconds=time.time() - start
             )
 
-        except subprocess.TimeoutExpired:
-            return TestResult(
-                test_id=test_id,
-                status=TestStatus.FAILED,
-                message="Timeout - disco muito lento",
-                duration_seconds=time.time() - start
-            )
         except Exception as e:
             return TestResult(
                 test_id=test_id,
@@ -676,30 +909,24 @@ class TestRunner:
         if "bad news" in low or "fake" in low:
             data["is_fake"] = True
 
-        m = re.search(r"\*Usable\* size:\s*([0-9.]+\s*\w+)\s*\((\d+)\s*blocks\)", output)
-        if m:
-            data["usable_size_human"] = m.group(1).strip()
-            data["usable_blocks"] = int(m.group(2))
-
-        m = re.search(r"Announced size:\s*([0-9.]+\s*\w+)\s*\((\d+)\s*blocks\)", output)
-        if m:
-            data["announced_size_human"] = m.group(1).strip()
-            data["announced_blocks"] = int(m.group(2))
-
-        m = re.search(r"Module:\s*([0-9.]+\s*\w+)", output)
-        if m:
-            data["module_size_human"] = m.group(1).strip()
-
-        m = re.search(r"Physical block size:\s*([0-9.]+)\s*Byte", output)
-        if m:
-            try:
-                data["physical_block_size_bytes"] = int(float(m.group(1)))
-            except Exception:
-                pass
-
-        m = re.search(r"--last-sec=(\d+)", output)
-        if m:
-            data["last_sec"] = int(m.group(1))
+        # Uma varredura; vale a primeira ocorrência de cada campo
+        for m in _RE_F3PROBE_FIELDS.finditer(output or ""):
+            kind = m.lastgroup
+            if kind == "usable_blocks" and data["usable_blocks"] is None:
+                data["usable_size_human"] = m.group("usable").strip()
+                data["usable_blocks"] = int(m.group("usable_blocks"))
+            elif kind == "announced_blocks" and data["announced_blocks"] is None:
+                data["announced_size_human"] = m.group("announced").strip()
+                data["announced_blocks"] = int(m.group("announced_blocks"))
+            elif kind == "module" and data["module_size_human"] is None:
+                data["module_size_human"] = m.group("module").strip()
+            elif kind == "phys" and data["physical_block_size_bytes"] is None:
+                try:
+                    data["physical_block_size_bytes"] = int(float(m.group("phys")))
+                except Exception:
+                    pass
+            elif kind == "last_sec" and data["last_sec"] is None:
+                data["last_sec"] = int(m.group("last_sec"))
 
         if data["last_sec"] is None and data.get("usable_blocks"):
             data["last_sec"] = int(data["usable_blocks"]) - 1
@@ -746,86 +973,119 @@ class TestRunner:
         cmd.append(session.device)
 
         try:
-            session._current_process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                text=True, bufsize=1
-            )
-
-            output_lines = []
-            bad_blocks = [0]
-            last_pct = [0.0]
-            current_pass = [1]
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            session._current_process = proc
+
+            # Só as últimas linhas ficam em memória; a saída completa vai para um
+            # arquivo em LOG_DIR, criado na primeira linha (disco são não gera arquivo)
+            output_tail = deque(maxlen=BADBLOCKS_TAIL_LINES)
+            log_file = None
+            bad_blocks = 0
+            last_pct = 0.0
+            current_pass = 1
             start_time = time.time()
+            last_report = 0.0
 
-            def read_stderr():
-                for line in iter(session._current_process.stderr.readline, ''):
-                    if not line.strip():
-                        continue
-                    m = re.search(r'(\d+\.?\d*)%\s*done', line)
-                    if m:
-                        last_pct[0] = float(m.group(1))
-                    if "pattern" in line.lower():
-                        current_pass[0] = min(current_pass[0] + 1, total_passes)
-
-            def read_stdout():
-                for line in iter(session._current_process.stdout.readline, ''):
-                    if not line.strip():
-                        continue
-                    output_lines.append(line)
-                    if line.strip().isdigit():
-                        bad_blocks[0] += 1
-
-            t_err = threading.Thread(target=read_stderr, daemon=True)
-            t_out = threading.Thread(target=read_stdout, daemon=True)
-            t_err.start()
-            t_out.start()
+            # Um único laço lê stdout (blocos ruins) e stderr (progresso), sem threads
+            sel = selectors.DefaultSelector()
+            carry = {}
+            for stream in (proc.stdout, proc.stderr):
+                os.set_blocking(stream.fileno(), False)
+                sel.register(stream, selectors.EVENT_READ)
+                carry[stream] = ""
 
-            while session._current_process.poll() is None:
-                if session.is_cancelled:
-                    session._current_process.terminate()
-                    try:
-                        session._current_process.wait(timeout=5)
-                    except Exception:
-                        session._current_process.kill()
-                    return TestResult(
-                        test_id=test_id,
-                        status=TestStatus.CANCELLED,
-                        message="Cancelado"
-                    )
-
-                elapsed = time.time() - start_time
-                pct = last_pct[0]
-                cp = current_pass[0]
+            try:
+                while sel.get_map():
+                    if session.is_cancelled:
+                        proc.terminate()
+                        try:
+                            proc.wait(timeout=5)
+                        except Exception:
+                            proc.kill()
+                        return TestResult(
+                            test_id=test_id,
+                            status=TestStatus.CANCELLED,
+                            message="Cancelado"
+                        )
+
+                    for key, _ in sel.select(timeout=1.0):
+                        stream = key.fileobj
+                        chunk = os.read(key.fd, 65536)
+                        if not chunk:
+                            sel.unregister(stream)
+                            pieces, carry[stream] = [carry[stream]], ""
+                        else:
+                            text = carry[stream] + chunk.decode("utf-8", errors="replace")
+                            if stream is proc.stderr:
+                                *pieces, carry[stream] = _RE_PROGRESS_SPLIT.split(text)
+                            else:
+                                *pieces, carry[stream] = text.split("\n")
+
+                        for piece in pieces:
+                            if not piece.strip():
+                                continue
+                            if stream is proc.stderr:
+                                pct = _parse_done_pct(piece)
+                                if pct is not None:
+                                    last_pct = pct
+                                if "pattern" in piece.lower():
+                                    current_pass = min(current_pass + 1, total_passes)
+                            else:
+                                line = piece + "\n"
+                                output_tail.append(line)
+                                if log_file is None:
+                                    log_file = tempfile.NamedTemporaryFile(
+                                        "w", encoding="utf-8", dir=LOG_DIR, delete=False,
+                                        prefix=f"badblocks_{mode}_", suffix=".log"
+                                    )
+                                log_file.write(line)
+                                if piece.strip().isdigit():
+                                    bad_blocks += 1
+
+                    # Progresso no máximo uma vez por segundo
+                    now = time.time()
+                    if now - last_report < 1:
+                        continue
+                    last_report = now
 
-                if total_passes > 1:
-                    overall_pct = ((cp - 1) * 100 + pct) / total_passes
-                else:
-                    overall_pct = pct
+                    elapsed = now - start_time
+                    pct = last_pct
+                    cp = current_pass
 
-                time_str = format_duration(elapsed)
+                    if total_passes > 1:
+                        overall_pct = ((cp - 1) * 100 + pct) / total_passes
+                    else:
+                        overall_pct = pct
 
-                if pct > 0:
-                    msg = f"Verificando (etapa {cp}/{total_passes})... {pct:.0f}% ({time_str})"
-                else:
-                    msg = f"Verificando (etapa {cp}/{total_passes})... ({time_str})"
+                    time_str = format_duration(elapsed)
 
-                progress = max(5, min(99, int(overall_pct)))
+                    if pct > 0:
+                        msg = f"Verificando (etapa {cp}/{total_passes})... {pct:.0f}% ({time_str})"
+                    else:
+                        msg = f"Verificando (etapa {cp}/{total_passes})... ({time_str})"
 
-                if session.on_progress:
-                    session.on_progress(test_id, progress, msg)
+                    progress = max(5, min(99, int(overall_pct)))
 
-                time.sleep(1)
+                    if session.on_progress:
+                        session.on_progress(test_id, progress, msg)
+            finally:
+                sel.close()
+                if log_file is not None:
+                    log_file.close()
 
-            t_err.join(timeout=3)
-            t_out.join(timeout=3)
+            proc.wait()
             session._current_process = None
 
-            if bad_blocks[0] > 0:
+            details = "".join(output_tail)
+            if log_file is not None:
+                details = f"(log completo: {log_file.name})\n" + details
+
+            if bad_blocks > 0:
                 return TestResult(
                     test_id=test_id,
                     status=TestStatus.FAILED,
-                    message=f"✗ {bad_blocks[0]} blocos defeituosos!",
-                    details="".join(output_lines),
+                    message=f"✗ {bad_blocks} blocos defeituosos!",
+                    details=details,
                     duration_seconds=time.time() - start_time
                 )
 
@@ -833,7 +1093,7 @@ class TestRunner:
                 test_id=test_id,
                 status=TestStatus.COMPLETED,
                 message="✓ Nenhum bloco defeituoso",
-                details="".join(output_lines),
+                details=details,
                 duration_seconds=time.time() - start_time
             )
 
@@ -847,11 +1107,9 @@ class TestRunner:
     @staticmethod
     def _is_mounted(device: str) -> bool:
         """Verifica se dispositivo está montado"""
-        base_dev = device.rstrip('0123456789p')
-        for part in psutil.disk_partitions(all=True):
-            if part.device.startswith(base_dev):
-                return True
-        return False
+        m = _DEV_BASE.match(device)
+        base_dev = m.group(1) if m else device
+        return any(dev.startswith(base_dev) for dev in _mounted_devices())
 
     @classmethod
     def cancel_session(cls, session: TestSession):
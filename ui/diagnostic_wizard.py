@@ -731,8 +731,8 @@ class DiagnosticWizard(ctk.CTkToplevel):
             return
 
         try:
-            # Atualiza temperatura do disco
-            smart = SmartParser.parse(self.device)
+            # Atualiza temperatura do disco (leitura no máximo tão velha quanto o intervalo)
+            smart = SmartParser.parse(self.device, ttl=5)
             temp = smart.temperature
 
             if temp:
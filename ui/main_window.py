@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Janela principal do HddMonitor
+"""
+
+import logging
+
+import customtkinter as ctk
+
+from ui import COLOR_BG_MAIN
+from ui.dashboard import Dashboard
+from ui.diagnostic_wizard import DiagnosticWizard
+
+logger = logging.getLogger("HddMonitor")
+
+# Tema definido antes de qualquer janela existir (evita redesenho inicial)
+ctk.set_appearance_mode("Dark")
+ctk.set_default_color_theme("blue")
+
+
+class HddMonitorApp(ctk.CTk):
+    def __init__(self):
+        super().__init__()
+        self.title("HddMonitor")
+        self.geometry("1000x700")
+        self.minsize(800, 600)
+        self.configure(fg_color=COLOR_BG_MAIN)
+
+        self.dashboard = Dashboard(
+            self,
+            on_disk_select=self._open_diagnostic
+        )
+        self.dashboard.pack(fill="both", expand=True)
+
+        self.dashboard.start_monitoring()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _open_diagnostic(self, device: str):
+        logger.info("Abrindo diagnóstico para %s", device)
+        DiagnosticWizard(self, device)
+
+    def _on_close(self):
+        logger.info("Fechando HddMonitor")
+        # Grava o que estiver no buffer de log antes de fechar
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        self.dashboard.stop_monitoring()
+        self.destroy()